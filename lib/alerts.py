@@ -0,0 +1,154 @@
+# lib/alerts.py
+# Budget alerts: raised when spending by a user in a category crosses a
+# threshold of its limit (lib/models/budget_limit.py) within a month or year.
+#
+# A check costs the same however much history exists. Limits are cached in
+# memory, so inserting for a user/category without a limit costs one dict
+# lookup. Otherwise the running period total is read from summary_rollups -
+# one primary-key row for a month, at most twelve for a year - on the
+# inserting connection, inside the same transaction, after the triggers have
+# added the new rows. A threshold fires when the total before the insert was
+# below it and the total after is at or above it, and is recorded in
+# budget_alerts at most once per limit and period.
+
+from datetime import date
+
+from lib.database import get_read_connection
+from lib.models.budget_limit import BudgetLimit
+
+_listeners = []
+
+
+class Alert:
+    __slots__ = ("limit_id", "user_id", "category_id", "period", "period_key",
+                 "threshold", "total_amount", "limit_amount", "transaction_id")
+
+    def __init__(self, limit, period_key, threshold, total_amount, transaction_id=None):
+        self.limit_id = limit.id
+        self.user_id = limit.user_id
+        self.category_id = limit.category_id
+        self.period = limit.period
+        self.period_key = period_key
+        self.threshold = threshold
+        self.total_amount = total_amount
+        self.limit_amount = limit.limit_amount
+        self.transaction_id = transaction_id
+
+    def message(self):
+        user, category = _name("user", self.user_id), _name("category", self.category_id)
+        return (f"{user} / {category} reached {self.threshold:.0%} of budget for {self.period_key}: "
+                f"KES {self.total_amount:,.2f} of KES {self.limit_amount:,.2f}")
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["message"] = self.message()
+        return data
+
+
+def _name(kind, ref_id):
+    if kind == "user":
+        from lib.models.user import User as Model
+    else:
+        from lib.models.category import Category as Model
+    obj = Model.get(ref_id)
+    return obj.name if obj else f"#{ref_id}"
+
+
+def subscribe(callback):
+    """Call `callback(alert)` for every alert raised in this process."""
+    _listeners.append(callback)
+
+
+def notify(alerts):
+    for alert in alerts:
+        for callback in _listeners:
+            callback(alert)
+
+
+def _period_total(conn, limit, period_key):
+    if limit.period == "month":
+        row = conn.execute(
+            "SELECT total_amount FROM summary_rollups WHERE user_id = ? AND category_id = ? AND month = ?",
+            (limit.user_id, limit.category_id, period_key)
+        ).fetchone()
+        return row[0] if row else 0.0
+    return conn.execute(
+        "SELECT TOTAL(total_amount) FROM summary_rollups "
+        "WHERE user_id = ? AND category_id = ? AND month BETWEEN ? AND ?",
+        (limit.user_id, limit.category_id, f"{period_key}-01", f"{period_key}-12")
+    ).fetchone()[0]
+
+
+def check(conn, rows, transaction_id=None):
+    """Raise alerts for (user_id, category_id, amount, budgeted_amount, variance, date)
+    rows just inserted on `conn`; call it inside the inserting transaction.
+
+    Returns the new alerts, lowest threshold first. Pass them to notify()
+    once the write is done.
+    """
+    pairs = BudgetLimit.by_pair()
+    if not pairs:
+        return []
+    added = {}   # (limit, period key) -> amount these rows added
+    months = {}  # date as typed -> YYYY-MM, normalized the way txn_date is
+    for user_id, category_id, amount, _, _, day in rows:
+        limits = pairs.get((user_id, category_id))
+        if not limits:
+            continue
+        if day not in months:
+            months[day] = conn.execute("SELECT substr(date(?), 1, 7)", (day,)).fetchone()[0]
+        month = months[day]
+        if month is None:
+            continue  # undated rows belong to no period
+        for limit in limits:
+            key = (limit, month if limit.period == "month" else month[:4])
+            added[key] = added.get(key, 0.0) + (amount or 0)
+
+    alerts = []
+    for (limit, period_key), amount in added.items():
+        after = _period_total(conn, limit, period_key)
+        before = after - amount
+        for threshold in limit.thresholds:
+            if before < threshold * limit.limit_amount <= after:
+                recorded = conn.execute(
+                    "INSERT OR IGNORE INTO budget_alerts (limit_id, user_id, category_id, period, period_key, "
+                    "threshold, total_amount, limit_amount, transaction_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (limit.id, limit.user_id, limit.category_id, limit.period, period_key,
+                     threshold, after, limit.limit_amount, transaction_id)
+                ).rowcount
+                if recorded:
+                    alerts.append(Alert(limit, period_key, threshold, after, transaction_id))
+    alerts.sort(key=lambda a: a.threshold)
+    return alerts
+
+
+def status(on=None):
+    """Return (headers, rows): every limit and what has been spent in the
+    month or year containing `on` (YYYY-MM-DD, default today)."""
+    day = date.fromisoformat(on).isoformat() if on else date.today().isoformat()
+    conn = get_read_connection()
+    rows = []
+    for limit in BudgetLimit.get_all():
+        period_key = day[:7] if limit.period == "month" else day[:4]
+        spent = _period_total(conn, limit, period_key)
+        reached = [t for t in limit.thresholds if spent >= t * limit.limit_amount]
+        state = ("Over" if spent > limit.limit_amount else f"{reached[-1]:.0%} reached") if reached else "OK"
+        rows.append([limit.id, _name("user", limit.user_id), _name("category", limit.category_id),
+                     limit.period, period_key, round(limit.limit_amount, 2), round(spent, 2),
+                     f"{spent / limit.limit_amount:.0%}", state])
+    return ["ID", "User", "Category", "Period", "Current", "Limit", "Spent", "Used", "Status"], rows
+
+
+def history(limit=50):
+    """Return (headers, rows) for the most recent alerts, newest first."""
+    rows = get_read_connection().execute('''
+        SELECT a.created_at, IFNULL(u.name, '#' || a.user_id), IFNULL(c.name, '#' || a.category_id),
+               a.period_key, a.threshold, a.total_amount, a.limit_amount, a.transaction_id
+        FROM budget_alerts a
+        LEFT JOIN users u ON a.user_id = u.id
+        LEFT JOIN categories c ON a.category_id = c.id
+        ORDER BY a.id DESC
+        LIMIT ?
+    ''', (limit,)).fetchall()
+    return (["Raised", "User", "Category", "Period", "Threshold", "Spent", "Limit", "Transaction"],
+            [[r[0], r[1], r[2], r[3], f"{r[4]:.0%}", round(r[5], 2), round(r[6], 2), r[7]] for r in rows])
@@ -0,0 +1,243 @@
+# lib/analytics.py
+# Columnar analytics over the transactions table: grouped totals, time-bucketed
+# trends, rolling windows and per-group quantiles.
+#
+# load() streams the table in fetchmany chunks into compact typed columns
+# (day, user_id, category_id, amount, budgeted_amount, variance). When NumPy
+# is installed the columns become NumPy arrays and every aggregation is a
+# vectorized bincount/cumsum/sort; otherwise the same results are computed
+# with array.array columns and plain loops, so NumPy stays optional.
+# Archived years are read too, but only those inside the requested date range.
+#
+# Every report function returns (headers, rows), ready for cli.print_table.
+
+import math
+from array import array
+from collections import defaultdict, deque
+from datetime import date, timedelta
+
+from lib import archive
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+CHUNK_SIZE = 100000
+FREQUENCIES = ("day", "week", "month")
+EPOCH = date(1970, 1, 1)
+FIELDS = ("amount", "budgeted_amount", "variance")
+
+
+class Columns:
+    """Column-oriented copy of (a filtered slice of) the transactions table.
+
+    `day` is days since 1970-01-01 of the normalized txn_date; undated rows
+    are not loaded. Columns are NumPy arrays when NumPy is available, else
+    array.array.
+    """
+
+    __slots__ = ("day", "user_id", "category_id", "amount", "budgeted_amount", "variance")
+
+    def __len__(self):
+        return len(self.day)
+
+
+def load(start=None, end=None, user_id=None, category_id=None, chunk_size=CHUNK_SIZE):
+    """Read matching transactions into Columns, `chunk_size` rows at a time."""
+    where, params = ["txn_date IS NOT NULL"], []
+    if start:
+        where.append("txn_date >= date(?)")
+        params.append(start)
+    if end:
+        where.append("txn_date <= date(?)")
+        params.append(end)
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+    if category_id is not None:
+        where.append("category_id = ?")
+        params.append(category_id)
+    sql = f'''
+        SELECT CAST(julianday(txn_date) - 2440587.5 AS INTEGER), IFNULL(user_id, 0), IFNULL(category_id, 0),
+               IFNULL(amount, 0), IFNULL(budgeted_amount, 0), IFNULL(variance, 0)
+        FROM {{transactions}}
+        WHERE {" AND ".join(where)}
+    '''
+
+    buffers = [array("q"), array("q"), array("q"), array("d"), array("d"), array("d")]
+    for cursor in archive.cursors(sql, params, start, end):
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for buffer, column in zip(buffers, zip(*rows)):
+                buffer.extend(column)
+
+    cols = Columns()
+    for name, buffer in zip(Columns.__slots__, buffers):
+        if np is not None:
+            buffer = np.frombuffer(buffer, dtype=np.int64 if buffer.typecode == "q" else np.float64)
+        setattr(cols, name, buffer)
+    return cols
+
+
+# --------------------------------------------------------------------
+# Buckets and groups
+# --------------------------------------------------------------------
+def _period_keys(cols, freq):
+    """Return (integer bucket key per row, key -> label) for a time frequency."""
+    if freq == "day":
+        return cols.day, lambda k: (EPOCH + timedelta(days=int(k))).isoformat()
+    if freq == "week":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        label = lambda k: (EPOCH + timedelta(days=int(k) * 7 - 3)).isoformat()
+        if np is not None:
+            return (cols.day + 3) // 7, label
+        return [(d + 3) // 7 for d in cols.day], label
+    if freq == "month":
+        label = lambda k: f"{1970 + int(k) // 12:04d}-{int(k) % 12 + 1:02d}"
+        if np is not None:
+            return cols.day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64), label
+        months = {}
+        keys = []
+        for d in cols.day:
+            m = months.get(d)
+            if m is None:
+                day = EPOCH + timedelta(days=d)
+                m = months[d] = (day.year - 1970) * 12 + day.month - 1
+            keys.append(m)
+        return keys, label
+    raise ValueError(f"unknown frequency {freq!r} (expected one of {', '.join(FREQUENCIES)})")
+
+
+def _group_sums(keys, cols):
+    """Return (sorted keys, counts, [sum per field]) grouping rows by `keys`."""
+    if np is not None:
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique))
+        sums = [np.bincount(inverse, weights=getattr(cols, f), minlength=len(unique)) for f in FIELDS]
+        return unique.tolist(), counts.tolist(), [s.tolist() for s in sums]
+    totals = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for key, amount, budget, variance in zip(keys, cols.amount, cols.budgeted_amount, cols.variance):
+        t = totals[key]
+        t[0] += 1
+        t[1] += amount
+        t[2] += budget
+        t[3] += variance
+    unique = sorted(totals)
+    return unique, [totals[k][0] for k in unique], [[totals[k][i] for k in unique] for i in (1, 2, 3)]
+
+
+def _names(by):
+    if by == "user":
+        from lib.models.user import User as Model
+    elif by == "category":
+        from lib.models.category import Category as Model
+    else:
+        raise ValueError(f"unknown grouping {by!r} (expected 'user' or 'category')")
+    _, by_id = Model.lookup()
+    return lambda k: by_id[k].name if k in by_id else f"#{k}"
+
+
+def _status(variance):
+    return "Under" if variance > 0 else ("Over" if variance < 0 else "Exact")
+
+
+# --------------------------------------------------------------------
+# Reports
+# --------------------------------------------------------------------
+def summary(cols, by="category"):
+    """Totals per user or category."""
+    name = _names(by)
+    keys, counts, (amounts, budgets, variances) = _group_sums(getattr(cols, f"{by}_id"), cols)
+    rows = [[name(k), n, round(a, 2), round(b, 2), round(v, 2), _status(v)]
+            for k, n, a, b, v in zip(keys, counts, amounts, budgets, variances)]
+    return [by.title(), "Count", "Total Actual", "Total Budget", "Variance", "Status"], rows
+
+
+def trend(cols, freq="month"):
+    """Totals per day, week (starting Monday) or month."""
+    keys, label = _period_keys(cols, freq)
+    keys, counts, (amounts, budgets, variances) = _group_sums(keys, cols)
+    rows = [[label(k), n, round(a, 2), round(b, 2), round(v, 2), _status(v)]
+            for k, n, a, b, v in zip(keys, counts, amounts, budgets, variances)]
+    return ["Period", "Count", "Actual", "Budget", "Variance", "Status"], rows
+
+
+_ROLLING_HEADERS = ["Period", "Actual", "Budget", "Variance",
+                    "Rolling Actual", "Rolling Budget", "Rolling Variance", "Rolling Status"]
+
+
+def rolling(cols, window=3, freq="month"):
+    """Per-period totals plus sums over the trailing `window` periods.
+
+    Periods with no transactions inside the range count as zero, so a
+    3-month window always spans three calendar months. A negative rolling
+    variance means the window as a whole is over budget.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    keys, label = _period_keys(cols, freq)
+    if not len(keys):
+        return _ROLLING_HEADERS, []
+    keys, _, sums = _group_sums(keys, cols)
+    first, last = keys[0], keys[-1]
+    if np is not None:
+        dense = np.zeros((3, last - first + 1))
+        dense[:, np.asarray(keys) - first] = sums
+        csum = np.cumsum(dense, axis=1)
+        windowed = csum.copy()
+        windowed[:, window:] -= csum[:, :-window]
+        per_period, per_window = dense.T.tolist(), windowed.T.tolist()
+    else:
+        by_key = dict(zip(keys, zip(*sums)))
+        per_period, per_window = [], []
+        running, recent = [0.0, 0.0, 0.0], deque()
+        for k in range(first, last + 1):
+            values = by_key.get(k, (0.0, 0.0, 0.0))
+            recent.append(values)
+            running = [r + v for r, v in zip(running, values)]
+            if len(recent) > window:
+                running = [r - v for r, v in zip(running, recent.popleft())]
+            per_period.append(values)
+            per_window.append(running)
+    rows = [[label(first + i), *(round(x, 2) for x in p), *(round(x, 2) for x in w), _status(w[2])]
+            for i, (p, w) in enumerate(zip(per_period, per_window))]
+    return _ROLLING_HEADERS, rows
+
+
+def _quantile(ordered, q):
+    """Linear-interpolated quantile of a sorted list (same method as numpy.quantile)."""
+    pos = q * (len(ordered) - 1)
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def quantiles(cols, by="category", field="variance", qs=(0.1, 0.5, 0.9)):
+    """Quantiles of `field` (amount, budgeted_amount or variance) per user or category."""
+    if field not in FIELDS:
+        raise ValueError(f"unknown field {field!r} (expected one of {', '.join(FIELDS)})")
+    if any(not 0 <= q <= 1 for q in qs):
+        raise ValueError("quantiles must be between 0 and 1")
+    name = _names(by)
+    groups, values = getattr(cols, f"{by}_id"), getattr(cols, field)
+    headers = [by.title(), "Count"] + [f"p{q * 100:g}" for q in qs]
+    rows = []
+    if np is not None:
+        if not len(groups):
+            return headers, rows
+        order = np.lexsort((values, groups))
+        groups, values = groups[order], values[order]
+        bounds = np.flatnonzero(np.diff(groups)) + 1
+        for g, chunk in zip(groups[np.r_[0, bounds]].tolist(), np.split(values, bounds)):
+            rows.append([name(g), len(chunk), *(round(x, 2) for x in np.quantile(chunk, qs).tolist())])
+        return headers, rows
+    by_group = defaultdict(list)
+    for g, v in zip(groups, values):
+        by_group[g].append(v)
+    for g in sorted(by_group):
+        ordered = sorted(by_group[g])
+        rows.append([name(g), len(ordered), *(round(_quantile(ordered, q), 2) for q in qs)])
+    return headers, rows
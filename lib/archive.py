@@ -0,0 +1,269 @@
+# lib/archive.py
+# Moves old transactions into per-year archive databases and routes queries
+# across the hot database and the archives.
+#
+# archive(cutoff) moves every transaction dated before `cutoff` into
+# <archive dir>/transactions_<year>.db (same columns, ids and indexes), so
+# the hot database only holds recent and undated rows. summary_rollups keeps
+# the archived totals, so the summary reports and budget alerts still cover
+# all history without opening an archive.
+#
+# Queries that read transactions are written against `{transactions}` and
+# run through query()/cursors(): the statement runs once on the hot table and
+# once per archive year that can hold matching rows - every year for plain
+# listings and searches, only the overlapping years when a date range is
+# given. Each archive is ATTACHed to the thread's read connection when first
+# needed (at most MAX_ATTACHED at a time), so joins with users and
+# categories work unchanged. Archived transactions are read-only, except
+# that purge() can delete them.
+
+import heapq
+import itertools
+import os
+import re
+import sqlite3
+
+from lib import database
+
+MAX_ATTACHED = 8  # SQLite allows 10 attached databases by default
+_FILE = re.compile(r"^transactions_(\d{4})\.db$")
+_partitions = (None, None, [])  # (directory, mtime, years) when last listed
+
+ARCHIVE_COLUMNS = "id, user_id, category_id, amount, budgeted_amount, variance, date, txn_date"
+
+
+def archive_dir():
+    """Directory holding the archive files (EXPENSE_TRACKER_ARCHIVE, or next to the database)."""
+    return os.environ.get("EXPENSE_TRACKER_ARCHIVE") or os.path.splitext(database.DB_PATH)[0] + "_archive"
+
+
+def archive_path(year):
+    return os.path.join(archive_dir(), f"transactions_{year}.db")
+
+
+def partitions(start=None, end=None):
+    """Archived years, ascending; with `start`/`end` (YYYY-MM-DD) only the years they overlap."""
+    global _partitions
+    directory = archive_dir()
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return []
+    cached_dir, cached_mtime, years = _partitions
+    if (cached_dir, cached_mtime) != (directory, mtime):
+        years = sorted(int(m.group(1)) for m in map(_FILE.match, os.listdir(directory)) if m)
+        _partitions = (directory, mtime, years)
+    first, last = _year(start), _year(end)
+    return [y for y in years if (first is None or y >= first) and (last is None or y <= last)]
+
+
+def _year(day):
+    """The year of a YYYY-MM-DD string, or None (no bound) if it has none."""
+    try:
+        return int(str(day)[:4]) if day else None
+    except ValueError:
+        return None
+
+
+def _schema(year):
+    return f"archive_{year}"
+
+
+def _attach(conn, years):
+    """Make sure every year in `years` is attached to `conn`, detaching others if needed."""
+    attached = [row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+    wanted = {_schema(y) for y in years}
+    missing = [y for y in years if _schema(y) not in attached]
+    spare = [name for name in attached if name not in wanted]
+    for year in missing:
+        if len(attached) >= MAX_ATTACHED:
+            name = spare.pop()
+            conn.execute(f"DETACH DATABASE {name}")
+            attached.remove(name)
+        conn.execute(f"ATTACH DATABASE ? AS {_schema(year)}", (archive_path(year),))
+        attached.append(_schema(year))
+
+
+def cursors(sql, params=(), start=None, end=None):
+    """Yield one cursor per partition for `sql`, which reads `{transactions}`.
+
+    Archives come first (oldest year first), then the hot table. Consume
+    each cursor before asking for the next one.
+    """
+    conn = database.get_read_connection()
+    years = partitions(start, end)
+    for chunk in (years[i:i + MAX_ATTACHED] for i in range(0, len(years), MAX_ATTACHED)):
+        _attach(conn, chunk)
+        for year in chunk:
+            yield conn.execute(sql.format(transactions=f"{_schema(year)}.transactions"), params)
+    yield conn.execute(sql.format(transactions="main.transactions"), params)
+
+
+def query(sql, params=(), start=None, end=None, key=None, limit=None, reverse=False):
+    """Run `sql` on every relevant partition and return all rows.
+
+    With `key`, each partition's rows must already be sorted by it (ORDER BY
+    in `sql`, descending if `reverse`) and the results are merged in that
+    order; `limit` then keeps only the first rows. Without archives this is
+    a single query.
+    """
+    results = [cursor.fetchall() for cursor in cursors(sql, params, start, end)]
+    if len(results) == 1:
+        rows = results[0]
+    elif key is not None:
+        rows = list(itertools.islice(heapq.merge(*results, key=key, reverse=reverse), limit))
+    else:
+        rows = [row for part in results for row in part]
+    return rows if limit is None else rows[:limit]
+
+
+def has_rows(where, params=()):
+    """True if any archived transaction matches `where` (the hot table is not checked)."""
+    sql = f"SELECT 1 FROM {{transactions}} WHERE {where} LIMIT 1"
+    return any(cursor.fetchone() for cursor in itertools.islice(cursors(sql, params), len(partitions())))
+
+
+# --------------------------------------------------------------------
+# Moving rows
+# --------------------------------------------------------------------
+ROLLUP_SELECT = '''
+    SELECT IFNULL(user_id, 0), IFNULL(category_id, 0), IFNULL(substr(txn_date, 1, 7), ''),
+           COUNT(*), TOTAL(amount), TOTAL(budgeted_amount), TOTAL(variance)
+    FROM {transactions}
+'''
+
+ROLLUP_ADD_SQL = '''
+    INSERT INTO summary_rollups
+        (user_id, category_id, month, txn_count, total_amount, total_budget, total_variance)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, category_id, month) DO UPDATE SET
+        txn_count = txn_count + excluded.txn_count,
+        total_amount = total_amount + excluded.total_amount,
+        total_budget = total_budget + excluded.total_budget,
+        total_variance = total_variance + excluded.total_variance
+'''
+
+
+ROLLUP_SUBTRACT_SQL = '''
+    UPDATE summary_rollups SET
+        txn_count = txn_count - ?4,
+        total_amount = total_amount - ?5,
+        total_budget = total_budget - ?6,
+        total_variance = total_variance - ?7
+    WHERE user_id = ?1 AND category_id = ?2 AND month = ?3
+'''
+
+
+def _create_partition(conn, schema):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.transactions (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            category_id INTEGER,
+            amount REAL,
+            budgeted_amount REAL,
+            variance REAL,
+            date TEXT,
+            txn_date TEXT
+        )
+    ''')
+    # Same indexes as the hot table, so routed queries use the same plans
+    for name, columns in (("user_date", "user_id, txn_date, amount, budgeted_amount, variance"),
+                          ("category_date", "category_id, txn_date, amount, budgeted_amount, variance"),
+                          ("date", "txn_date"), ("amount", "amount")):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_{name} ON transactions ({columns})")
+
+
+def archive(cutoff):
+    """Move transactions dated before `cutoff` (YYYY-MM-DD) into per-year archives.
+
+    Returns {year: rows moved}. Each year is one transaction across the hot
+    database and its archive file; the copy ignores ids already archived, so
+    an interrupted run can simply be repeated. Must not be called inside a
+    `transaction()` block (SQLite cannot ATTACH mid-transaction).
+    """
+    conn = database.get_connection()
+    years = [int(row[0]) for row in conn.execute(
+        "SELECT DISTINCT substr(txn_date, 1, 4) FROM transactions WHERE txn_date < date(?) ORDER BY 1",
+        (cutoff,))]
+    os.makedirs(archive_dir(), exist_ok=True)
+    moved = {}
+    for year in years:
+        schema = _schema(year)
+        where = "txn_date >= ? AND txn_date < min(date(?), ?)"
+        params = (f"{year}-01-01", cutoff, f"{year + 1}-01-01")
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (archive_path(year),))
+        try:
+            with database.transaction():
+                _create_partition(conn, schema)
+                conn.execute(
+                    f"INSERT OR IGNORE INTO {schema}.transactions ({ARCHIVE_COLUMNS}) "
+                    f"SELECT {ARCHIVE_COLUMNS} FROM main.transactions WHERE {where}", params)
+                # The delete trigger subtracts the rows from summary_rollups; add them back
+                totals = conn.execute(
+                    ROLLUP_SELECT.format(transactions="main.transactions") + f" WHERE {where} GROUP BY 1, 2, 3",
+                    params).fetchall()
+                moved[year] = conn.execute(f"DELETE FROM main.transactions WHERE {where}", params).rowcount
+                conn.executemany(ROLLUP_ADD_SQL, totals)
+        finally:
+            conn.execute(f"DETACH DATABASE {schema}")
+    return moved
+
+
+def purge(where, params=(), start=None, end=None, chunk_size=1000):
+    """Delete archived transactions matching `where` (unprefixed column names).
+
+    Works `chunk_size` rows at a time: each chunk is subtracted from
+    summary_rollups in a transaction on the main database, and deleted from
+    the archive through a separate connection (so this also works inside a
+    `transaction()` block, where ATTACH is not allowed). If the process dies
+    between the two commits, `rebuild-rollups` repairs the totals.
+    Returns the number of rows deleted.
+    """
+    deleted = 0
+    for year in partitions(start, end):
+        part = sqlite3.connect(archive_path(year), isolation_level=None)
+        try:
+            part.execute("PRAGMA busy_timeout = 5000")
+            while True:
+                ids = [row[0] for row in part.execute(
+                    f"SELECT id FROM transactions WHERE {where} LIMIT ?", (*params, chunk_size))]
+                if not ids:
+                    break
+                marks = ", ".join("?" * len(ids))
+                totals = part.execute(
+                    ROLLUP_SELECT.format(transactions="transactions") + f" WHERE id IN ({marks}) GROUP BY 1, 2, 3",
+                    ids).fetchall()
+                with database.transaction() as conn:
+                    conn.executemany(ROLLUP_SUBTRACT_SQL, totals)
+                    conn.executemany(
+                        "DELETE FROM summary_rollups WHERE user_id = ? AND category_id = ? AND month = ? "
+                        "AND txn_count <= 0", [row[:3] for row in totals])
+                    part.execute("BEGIN IMMEDIATE")
+                    try:
+                        part.execute(f"DELETE FROM transactions WHERE id IN ({marks})", ids)
+                    except BaseException:
+                        part.execute("ROLLBACK")
+                        raise
+                    part.execute("COMMIT")
+                deleted += len(ids)
+        finally:
+            part.close()
+    return deleted
+
+
+def archived_rollups():
+    """Yield summary_rollups-style (user_id, category_id, month, count, amount, budget, variance)
+    rows aggregated over every archive."""
+    sql = ROLLUP_SELECT + " GROUP BY 1, 2, 3"
+    for cursor in itertools.islice(cursors(sql), len(partitions())):
+        yield from cursor
+
+
+def summary():
+    """Return (headers, rows): row count and date range of every archive year."""
+    rows = []
+    for year, cursor in zip(partitions(), cursors("SELECT COUNT(*), MIN(txn_date), MAX(txn_date) FROM {transactions}")):
+        count, first, last = cursor.fetchone()
+        rows.append([year, count, first, last, os.path.getsize(archive_path(year))])
+    return ["Year", "Transactions", "First", "Last", "Bytes"], rows
@@ -0,0 +1,228 @@
+# lib/benchmark.py
+# Reproducible performance benchmarks for the operations the CLI exposes.
+# A deterministic synthetic dataset (seeded users, categories and transactions
+# with skewed dates and amounts) is generated into a temporary database, every
+# operation is timed several times, and the results are reported as JSON with
+# percentiles so runs can be compared between commits.
+
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import date, timedelta
+
+from lib import database
+
+CATEGORY_NAMES = [
+    "Rent", "Food", "Utilities", "Transport", "Health", "Education", "Entertainment",
+    "Clothing", "Insurance", "Savings", "Gifts", "Travel", "Internet", "Fuel", "Repairs",
+]
+
+
+def generate_dataset(path, users=50, categories=15, transactions=10000, seed=42,
+                     end=date(2025, 12, 31), days=3 * 365, batch_size=50000):
+    """Create a database at `path` filled with deterministic synthetic data.
+
+    Dates are skewed towards `end` (recent months are busier), user and
+    category activity follows a Zipf-like skew, and amounts are log-normal
+    with budgets scattered around them, so some rows are over and some under
+    budget. The same arguments always produce the same data.
+    """
+    rng = random.Random(seed)
+    database.configure(path)
+    database.create_tables()
+
+    from lib.models.transaction import Transaction
+
+    with database.transaction() as conn:
+        conn.executemany("INSERT INTO users (name) VALUES (?)",
+                         [(f"User {i:05d}",) for i in range(1, users + 1)])
+        conn.executemany("INSERT INTO categories (name) VALUES (?)",
+                         [(CATEGORY_NAMES[i % len(CATEGORY_NAMES)] + ("" if i < len(CATEGORY_NAMES) else f" {i}"),)
+                          for i in range(categories)])
+
+    user_weights = [1 / (i + 1) for i in range(users)]
+    category_weights = [1 / (i + 1) for i in range(categories)]
+    user_ids = list(range(1, users + 1))
+    category_ids = list(range(1, categories + 1))
+    remaining = transactions
+    while remaining > 0:
+        n = min(batch_size, remaining)
+        rows = []
+        picked_users = rng.choices(user_ids, user_weights, k=n)
+        picked_categories = rng.choices(category_ids, category_weights, k=n)
+        for user_id, category_id in zip(picked_users, picked_categories):
+            # Exponential age: half the transactions fall in the most recent ~quarter of the range
+            age = min(int(rng.expovariate(4 / days)), days - 1)
+            amount = round(math.exp(rng.gauss(7, 1.2)), 2)
+            budget = round(amount * rng.uniform(0.7, 1.3), -1)
+            rows.append((user_id, category_id, amount, budget, budget - amount,
+                         (end - timedelta(days=age)).isoformat()))
+        Transaction.bulk_insert(rows)
+        remaining -= n
+
+
+def percentiles(samples):
+    """Summary statistics (milliseconds) for a list of durations in seconds."""
+    ordered = sorted(s * 1000 for s in samples)
+    if not ordered:
+        return {"runs": 0, "min_ms": None, "p50_ms": None, "p90_ms": None, "p99_ms": None,
+                "max_ms": None, "mean_ms": None}
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0],
+        "p50_ms": rank(50),
+        "p90_ms": rank(90),
+        "p99_ms": rank(99),
+        "max_ms": ordered[-1],
+        "mean_ms": sum(ordered) / len(ordered),
+    }
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def operations(seed=42):
+    """Return [(name, callable)] for every operation to time.
+
+    Read-only operations come first; the inserts at the end grow the
+    (copied) dataset slightly, which does not affect the reads measured
+    before them.
+    """
+    from lib.models.user import User
+    from lib.models.category import Category
+    from lib.models.transaction import Transaction
+    from lib.reports import category_summary, user_summary
+
+    rng = random.Random(seed)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    def safe_delete(model, ref_id):
+        # The busiest user/category always has transactions, so this only runs the check
+        with quiet:
+            model.delete(ref_id)
+
+    def bulk_rows(n=1000):
+        return [(1, 1, 100.0, 120.0, 20.0, "2025-06-15")] * n
+
+    return [
+        ("transaction.get_all", Transaction.get_all),
+        ("transaction.get_page", lambda: Transaction.get_page()),
+        ("report.category_summary", category_summary),
+        ("report.user_summary", user_summary),
+        ("search.user", lambda: Transaction.search_by_user("User 0000")),
+        ("search.category", lambda: Transaction.search_by_category("Foo")),
+        ("search.date_range", lambda: Transaction.search_by_date("2025-12-01", "2025-12-07")),
+        ("search.amount_range", lambda: Transaction.search_by_amount(1000, 1010)),
+        ("search.status_over", lambda: Transaction.search_by_status("over")),
+        ("user.delete_check", lambda: safe_delete(User, 1)),
+        ("category.delete_check", lambda: safe_delete(Category, 1)),
+        ("transaction.save", lambda: Transaction(1, 1, rng.uniform(1, 500), 250.0, "2025-06-15").save()),
+        ("transaction.bulk_insert_1000", lambda: Transaction.bulk_insert(bulk_rows())),
+    ]
+
+
+def _counts(path):
+    """Row counts of the dataset in the database file at `path`."""
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("users", "categories", "transactions")}
+    finally:
+        conn.close()
+
+
+def _copy_database(source, target):
+    """Copy a (WAL-mode) database file with SQLite's backup API."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(users=50, categories=15, transactions=10000, seed=42, repeat=5,
+                   only=None, db_path=None):
+    """Generate a dataset, time every operation and return the results as a dict.
+
+    `only` limits the run to operation names containing any of the given
+    strings. With `db_path` the dataset is written there (and reused if the
+    file already exists); otherwise a temporary file is used and removed.
+    The operations always run on a temporary copy, so the inserts they time
+    never change the dataset and reruns stay comparable. The reported
+    dataset is the row counts actually measured.
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat must be at least 1, got {repeat}")
+    tmpdir = tempfile.TemporaryDirectory(prefix="expense-bench-")
+    try:
+        start = time.perf_counter()
+        reused = db_path is not None and os.path.exists(db_path)
+        if db_path is None:
+            db_path = os.path.join(tmpdir.name, "dataset.db")
+        if reused:
+            database.configure(db_path)
+            database.create_tables()  # bring an older dataset up to the current schema
+        else:
+            generate_dataset(db_path, users, categories, transactions, seed)
+        database.close_all()
+        generate_seconds = time.perf_counter() - start
+        dataset = dict(_counts(db_path), seed=None if reused else seed, reused=reused)
+        run_path = os.path.join(tmpdir.name, "bench.db")
+        _copy_database(db_path, run_path)
+        database.configure(run_path)
+
+        results = {}
+        for name, fn in operations(seed):
+            if only and not any(part in name for part in only):
+                continue
+            fn()  # warm the page cache and statement cache
+            results[name] = _time(fn, repeat)
+        return {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "dataset": dataset,
+            "generate_seconds": generate_seconds,
+            "repeat": repeat,
+            "results": results,
+        }
+    finally:
+        database.close_all()
+        tmpdir.cleanup()
+
+
+def write_results(results, path=None):
+    """Write results as JSON to `path`, or to stdout."""
+    text = json.dumps(results, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -3,10 +3,15 @@
 # Includes CRUD, summary reports, and search/filter features.
 # Uses only built-in Python to draw tables (no external libraries).
 
+import itertools
+
 from lib.models.user import User
 from lib.models.category import Category
 from lib.models.transaction import Transaction
-from lib.database import CURSOR
+from lib.models.budget_limit import BudgetLimit
+from lib.reports import category_summary, user_summary
+from lib.instrumentation import section
+from lib import alerts
 
 # --------------------------------------------------------------------
 # Helper function: print simple tables (no external libraries needed)
@@ -28,6 +33,44 @@ def print_table(headers, rows):
         print("| " + " | ".join(str(r[i]).ljust(widths[i]) for i in range(len(headers))) + " |")
     print(line)
 
+def print_table_stream(headers, rows, widths=None, sample_size=100):
+    """Draws a table while rows are still being read, for long listings.
+
+    Column widths are sampled from the first `sample_size` rows (never
+    narrower than `widths`, if given); later cells that don't fit are cut
+    short. Only the sample is held in memory. Returns the widths used so the
+    next page can keep the same layout.
+    """
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, sample_size))
+    if not sample:
+        print("(No data found.)")
+        return widths
+    widths = list(widths) if widths else [len(h) for h in headers]
+    for r in sample:
+        for i, cell in enumerate(r):
+            widths[i] = max(widths[i], len(str(cell)))
+
+    def fit(cell, width):
+        text = str(cell)
+        return text.ljust(width) if len(text) <= width else text[:max(width - 3, 0)] + "..."[:width]
+
+    line = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+    print(line)
+    print("| " + " | ".join(fit(h, widths[i]) for i, h in enumerate(headers)) + " |")
+    print(line)
+    for r in itertools.chain(sample, rows):
+        print("| " + " | ".join(fit(r[i], widths[i]) for i in range(len(headers))) + " |")
+    print(line)
+    return widths
+
+# --------------------------------------------------------------------
+# Helper function: one joined transaction row formatted for display
+# --------------------------------------------------------------------
+def transaction_row(t):
+    status = "Under" if t[5] > 0 else ("Over" if t[5] < 0 else "Exact")
+    return [t[0], t[1], t[2], f"KES {t[3]:,.2f}", f"KES {t[4]:,.2f}", f"KES {t[5]:,.2f}", status, t[6]]
+
 # --------------------------------------------------------------------
 def main_menu():
     """Main interactive loop to handle user input and commands."""
@@ -46,262 +89,303 @@ def main_menu():
         print("11. Category Summary Report")
         print("12. User Summary Report")
         print("13. Search or Filter Transactions")
+        print("14. Budget Limits & Alerts")
 
         choice = input("\nSelect an option: ").strip()
 
-        # ---------------- Add User ----------------
-        if choice == "1":
-            name = input("Enter user name: ").strip()
-            if name:
-                User(name).save()
-                print(f"User '{name}' added successfully.")
-            else:
-                print("Name cannot be empty.")
-
-        # ---------------- Add Category ----------------
-        elif choice == "2":
-            name = input("Enter category name: ").strip()
-            if name:
-                Category(name).save()
-                print(f"Category '{name}' added successfully.")
-            else:
-                print("Category name cannot be empty.")
-
-        # ---------------- Record Transaction ----------------
-        elif choice == "3":
-            print("\n-- Record a New Transaction --")
-
-            users = User.get_all()
-            if not users:
-                print("No users found. Please add one first.")
-                continue
-            print_table(["User ID", "Name"], [[u.id, u.name] for u in users])
-
-            categories = Category.get_all()
-            if not categories:
-                print("No categories found. Please add one first.")
-                continue
-            print_table(["Category ID", "Category"], [[c.id, c.name] for c in categories])
-
-            try:
-                user_id = int(input("\nEnter user ID: "))
-                category_id = int(input("Enter category ID: "))
-                amount = float(input("Enter actual amount spent: "))
-                budgeted = float(input("Enter budgeted amount: "))
-                date = input("Enter date (YYYY-MM-DD): ").strip()
-
-                t = Transaction(user_id, category_id, amount, budgeted, date)
-                t.save()
-                print("\nTransaction recorded successfully.")
-                if t.variance > 0:
-                    print(f"Under budget by KES {t.variance:.2f}")
-                elif t.variance < 0:
-                    print(f"Overspent by KES {-t.variance:.2f}")
+        # Time each option (and the queries it runs) when profiling is on
+        with section(f"menu {choice}"):
+            # ---------------- Add User ----------------
+            if choice == "1":
+                name = input("Enter user name: ").strip()
+                if name:
+                    User(name).save()
+                    print(f"User '{name}' added successfully.")
                 else:
-                    print("Spent exactly as budgeted.")
-            except ValueError:
-                print("Invalid input. Please enter numbers correctly.")
-
-        # ---------------- View Transactions ----------------
-        elif choice == "4":
-            data = Transaction.get_all()
-            if not data:
-                print("No transactions yet.")
-            else:
-                rows = []
-                for t in data:
-                    status = "Under" if t[5] > 0 else ("Over" if t[5] < 0 else "Exact")
-                    rows.append([
-                        t[0], t[1], t[2],
-                        f"KES {t[3]:,.2f}",
-                        f"KES {t[4]:,.2f}",
-                        f"KES {t[5]:,.2f}",
-                        status, t[6]
-                    ])
-                print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Status", "Date"], rows)
-
-        # ---------------- View Users ----------------
-        elif choice == "5":
-            users = User.get_all()
-            print_table(["ID", "Name"], [[u.id, u.name] for u in users])
-
-        # ---------------- View Categories ----------------
-        elif choice == "6":
-            cats = Category.get_all()
-            print_table(["ID", "Category"], [[c.id, c.name] for c in cats])
-
-        # ---------------- Delete Category ----------------
-        elif choice == "7":
-            cats = Category.get_all()
-            print_table(["ID", "Category"], [[c.id, c.name] for c in cats])
-            try:
-                cid = int(input("Enter category ID to delete: "))
-                if input("Are you sure? (y/n): ").lower() == "y":
-                    if Category.delete(cid):
-                        print("Category deleted.")
-            except ValueError:
-                print("Invalid ID.")
-
-        # ---------------- Delete Transaction ----------------
-        elif choice == "8":
-            data = Transaction.get_all()
-            print_table(["ID", "User", "Category", "Actual"], [[t[0], t[1], t[2], f"KES {t[3]:,.2f}"] for t in data])
-            try:
-                tid = int(input("Enter transaction ID to delete: "))
-                if input("Are you sure? (y/n): ").lower() == "y":
-                    Transaction.delete(tid)
-                    print("Transaction deleted.")
-            except ValueError:
-                print("Invalid ID.")
-
-        # ---------------- Delete User ----------------
-        elif choice == "9":
-            users = User.get_all()
-            print_table(["ID", "Name"], [[u.id, u.name] for u in users])
-            try:
-                uid = int(input("Enter user ID to delete: "))
-                if input("Are you sure? (y/n): ").lower() == "y":
-                    if User.delete(uid):
-                        print("User deleted.")
-            except ValueError:
-                print("Invalid ID.")
-
-        # ---------------- Exit ----------------
-        elif choice == "10":
-            print("Goodbye! All data saved in 'database.db'.")
-            break
-
-        # ---------------- Category Summary Report ----------------
-        elif choice == "11":
-            q = '''
-                SELECT c.name, SUM(t.amount), SUM(t.budgeted_amount), SUM(t.variance)
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                GROUP BY c.name
-            '''
-            rows = CURSOR.execute(q).fetchall()
-            table = []
-            for r in rows:
-                status = "Under" if r[3] > 0 else ("Over" if r[3] < 0 else "Exact")
-                table.append([r[0], f"KES {r[1]:,.2f}", f"KES {r[2]:,.2f}", f"KES {r[3]:,.2f}", status])
-            print_table(["Category", "Total Actual", "Total Budget", "Variance", "Status"], table)
-
-        # ---------------- User Summary Report ----------------
-        elif choice == "12":
-            q = '''
-                SELECT u.name, SUM(t.amount), SUM(t.budgeted_amount), SUM(t.variance)
-                FROM transactions t
-                JOIN users u ON t.user_id = u.id
-                GROUP BY u.name
-            '''
-            rows = CURSOR.execute(q).fetchall()
-            table = []
-            for r in rows:
-                status = "Under" if r[3] > 0 else ("Over" if r[3] < 0 else "Exact")
-                table.append([r[0], f"KES {r[1]:,.2f}", f"KES {r[2]:,.2f}", f"KES {r[3]:,.2f}", status])
-            print_table(["User", "Total Actual", "Total Budget", "Variance", "Status"], table)
-
-        # ---------------- Search / Filter Feature ----------------
-        elif choice == "13":
-            print("\n--- SEARCH / FILTER TRANSACTIONS ---")
-            print("1. Search by User")
-            print("2. Search by Category")
-            print("3. Search by Date Range")
-            print("4. Search by Amount Range")
-            print("5. Filter by Variance Status")
-            print("6. Back to Main Menu")
-            sub_choice = input("\nSelect an option: ").strip()
-
-            # Search by User
-            if sub_choice == "1":
-                name = input("Enter user name (or part of it): ").lower()
-                q = '''
-                    SELECT t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date
-                    FROM transactions t
-                    JOIN users u ON t.user_id = u.id
-                    JOIN categories c ON t.category_id = c.id
-                    WHERE LOWER(u.name) LIKE ?
-                '''
-                rows = CURSOR.execute(q, (f"%{name}%",)).fetchall()
-                print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
-                            [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
-
-            # Search by Category
-            elif sub_choice == "2":
-                category = input("Enter category name (or part of it): ").lower()
-                q = '''
-                    SELECT t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date
-                    FROM transactions t
-                    JOIN users u ON t.user_id = u.id
-                    JOIN categories c ON t.category_id = c.id
-                    WHERE LOWER(c.name) LIKE ?
-                '''
-                rows = CURSOR.execute(q, (f"%{category}%",)).fetchall()
-                print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
-                            [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
-
-            # Filter by Date Range
-            elif sub_choice == "3":
-                start = input("Start date (YYYY-MM-DD): ").strip()
-                end = input("End date (YYYY-MM-DD): ").strip()
-                q = '''
-                    SELECT t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date
-                    FROM transactions t
-                    JOIN users u ON t.user_id = u.id
-                    JOIN categories c ON t.category_id = c.id
-                    WHERE date(t.date) BETWEEN date(?) AND date(?)
-                '''
-                rows = CURSOR.execute(q, (start, end)).fetchall()
-                print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
-                            [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
-
-            # Filter by Amount Range
-            elif sub_choice == "4":
+                    print("Name cannot be empty.")
+
+            # ---------------- Add Category ----------------
+            elif choice == "2":
+                name = input("Enter category name: ").strip()
+                if name:
+                    Category(name).save()
+                    print(f"Category '{name}' added successfully.")
+                else:
+                    print("Category name cannot be empty.")
+
+            # ---------------- Record Transaction ----------------
+            elif choice == "3":
+                print("\n-- Record a New Transaction --")
+
+                users = User.get_all()
+                if not users:
+                    print("No users found. Please add one first.")
+                    continue
+                print_table(["User ID", "Name"], [[u.id, u.name] for u in users])
+
+                categories = Category.get_all()
+                if not categories:
+                    print("No categories found. Please add one first.")
+                    continue
+                print_table(["Category ID", "Category"], [[c.id, c.name] for c in categories])
+
+                try:
+                    user_id = int(input("\nEnter user ID: "))
+                    category_id = int(input("Enter category ID: "))
+                    amount = float(input("Enter actual amount spent: "))
+                    budgeted = float(input("Enter budgeted amount: "))
+                    date = input("Enter date (YYYY-MM-DD): ").strip()
+
+                    t = Transaction(user_id, category_id, amount, budgeted, date)
+                    raised = t.save()
+                    print("\nTransaction recorded successfully.")
+                    if t.variance > 0:
+                        print(f"Under budget by KES {t.variance:.2f}")
+                    elif t.variance < 0:
+                        print(f"Overspent by KES {-t.variance:.2f}")
+                    else:
+                        print("Spent exactly as budgeted.")
+                    for alert in raised:
+                        print(f"ALERT: {alert.message()}")
+                except ValueError as e:
+                    print(f"Invalid input: {e}")
+
+            # ---------------- View Transactions ----------------
+            elif choice == "4":
+                cursor, widths, page = None, None, 1
+                while True:
+                    data, cursor = Transaction.get_page(cursor)
+                    if not data:
+                        print("No transactions yet.")
+                        break
+                    print(f"\nPage {page}")
+                    widths = print_table_stream(
+                        ["ID", "User", "Category", "Actual", "Budget", "Variance", "Status", "Date"],
+                        map(transaction_row, data), widths)
+                    if cursor is None or input("Press Enter for the next page, or q to stop: ").strip().lower() == "q":
+                        break
+                    page += 1
+
+            # ---------------- View Users ----------------
+            elif choice == "5":
+                users = User.get_all()
+                print_table(["ID", "Name"], [[u.id, u.name] for u in users])
+
+            # ---------------- View Categories ----------------
+            elif choice == "6":
+                cats = Category.get_all()
+                print_table(["ID", "Category"], [[c.id, c.name] for c in cats])
+
+            # ---------------- Delete Category ----------------
+            elif choice == "7":
+                cats = Category.get_all()
+                print_table(["ID", "Category"], [[c.id, c.name] for c in cats])
+                try:
+                    cid = int(input("Enter category ID to delete: "))
+                    if input("Are you sure? (y/n): ").lower() == "y":
+                        if Category.delete(cid):
+                            print("Category deleted.")
+                        elif input("Delete its transactions as well? (y/n): ").lower() == "y":
+                            Category.delete(cid, cascade=True)
+                            print("Category and its transactions deleted.")
+                except ValueError:
+                    print("Invalid ID.")
+
+            # ---------------- Delete Transaction ----------------
+            elif choice == "8":
+                cursor, widths = None, None
+                while True:
+                    data, cursor = Transaction.get_page(cursor)
+                    widths = print_table_stream(["ID", "User", "Category", "Actual"],
+                                                ([t[0], t[1], t[2], f"KES {t[3]:,.2f}"] for t in data), widths)
+                    prompt = "Enter transaction ID to delete" + (" (or n for the next page): " if cursor else ": ")
+                    answer = input(prompt).strip().lower()
+                    if answer != "n" or cursor is None:
+                        break
+                try:
+                    tid = int(answer)
+                    if input("Are you sure? (y/n): ").lower() == "y":
+                        if Transaction.delete(tid):
+                            print("Transaction deleted.")
+                        else:
+                            print("No transaction with that ID.")
+                except ValueError:
+                    print("Invalid ID.")
+
+            # ---------------- Delete User ----------------
+            elif choice == "9":
+                users = User.get_all()
+                print_table(["ID", "Name"], [[u.id, u.name] for u in users])
                 try:
-                    min_amt = float(input("Enter minimum amount: "))
-                    max_amt = float(input("Enter maximum amount: "))
-                    q = '''
-                        SELECT t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date
-                        FROM transactions t
-                        JOIN users u ON t.user_id = u.id
-                        JOIN categories c ON t.category_id = c.id
-                        WHERE t.amount BETWEEN ? AND ?
-                    '''
-                    rows = CURSOR.execute(q, (min_amt, max_amt)).fetchall()
+                    uid = int(input("Enter user ID to delete: "))
+                    if input("Are you sure? (y/n): ").lower() == "y":
+                        if User.delete(uid):
+                            print("User deleted.")
+                        elif input("Delete their transactions as well? (y/n): ").lower() == "y":
+                            User.delete(uid, cascade=True)
+                            print("User and their transactions deleted.")
+                except ValueError:
+                    print("Invalid ID.")
+
+            # ---------------- Exit ----------------
+            elif choice == "10":
+                print("Goodbye! All data saved in 'database.db'.")
+                break
+
+            # ---------------- Category Summary Report ----------------
+            elif choice == "11":
+                rows = category_summary()
+                table = []
+                for r in rows:
+                    status = "Under" if r[3] > 0 else ("Over" if r[3] < 0 else "Exact")
+                    table.append([r[0], f"KES {r[1]:,.2f}", f"KES {r[2]:,.2f}", f"KES {r[3]:,.2f}", status])
+                print_table(["Category", "Total Actual", "Total Budget", "Variance", "Status"], table)
+
+            # ---------------- User Summary Report ----------------
+            elif choice == "12":
+                rows = user_summary()
+                table = []
+                for r in rows:
+                    status = "Under" if r[3] > 0 else ("Over" if r[3] < 0 else "Exact")
+                    table.append([r[0], f"KES {r[1]:,.2f}", f"KES {r[2]:,.2f}", f"KES {r[3]:,.2f}", status])
+                print_table(["User", "Total Actual", "Total Budget", "Variance", "Status"], table)
+
+            # ---------------- Search / Filter Feature ----------------
+            elif choice == "13":
+                print("\n--- SEARCH / FILTER TRANSACTIONS ---")
+                print("1. Search by User")
+                print("2. Search by Category")
+                print("3. Search by Date Range")
+                print("4. Search by Amount Range")
+                print("5. Filter by Variance Status")
+                print("6. Combined Filter")
+                print("7. Back to Main Menu")
+                sub_choice = input("\nSelect an option: ").strip()
+
+                # Search by User
+                if sub_choice == "1":
+                    name = input("Enter user name (or part of it): ").strip()
+                    rows = Transaction.search_by_user(name)
                     print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
                                 [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
-                except ValueError:
-                    print("Invalid input. Please enter numbers correctly.")
-
-            # Filter by Variance Status (Under / Over / Exact)
-            elif sub_choice == "5":
-                print("1. Under Budget")
-                print("2. Over Budget")
-                print("3. Exact Budget")
-                status_choice = input("Select: ").strip()
-                if status_choice == "1":
-                    condition = "t.variance > 0"
-                elif status_choice == "2":
-                    condition = "t.variance < 0"
-                elif status_choice == "3":
-                    condition = "t.variance = 0"
+
+                # Search by Category
+                elif sub_choice == "2":
+                    category = input("Enter category name (or part of it): ").strip()
+                    rows = Transaction.search_by_category(category)
+                    print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
+                                [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
+
+                # Filter by Date Range
+                elif sub_choice == "3":
+                    start = input("Start date (YYYY-MM-DD): ").strip()
+                    end = input("End date (YYYY-MM-DD): ").strip()
+                    rows = Transaction.search_by_date(start, end)
+                    print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
+                                [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
+
+                # Filter by Amount Range
+                elif sub_choice == "4":
+                    try:
+                        min_amt = float(input("Enter minimum amount: "))
+                        max_amt = float(input("Enter maximum amount: "))
+                        rows = Transaction.search_by_amount(min_amt, max_amt)
+                        print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
+                                    [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
+                    except ValueError:
+                        print("Invalid input. Please enter numbers correctly.")
+
+                # Filter by Variance Status (Under / Over / Exact)
+                elif sub_choice == "5":
+                    print("1. Under Budget")
+                    print("2. Over Budget")
+                    print("3. Exact Budget")
+                    status_choice = input("Select: ").strip()
+                    status = {"1": "under", "2": "over", "3": "exact"}.get(status_choice)
+                    if status is None:
+                        print("Invalid selection.")
+                        continue
+                    rows = Transaction.search_by_status(status)
+                    print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
+                                [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
+
+                # Combined Filter: any mix of the above in one query
+                elif sub_choice == "6":
+                    print("Leave a field blank to skip it.")
+                    user = input("User name (or part of it): ").strip()
+                    category = input("Category name (or part of it): ").strip()
+                    start = input("Start date (YYYY-MM-DD): ").strip()
+                    end = input("End date (YYYY-MM-DD): ").strip()
+                    min_amt = input("Minimum amount: ").strip()
+                    max_amt = input("Maximum amount: ").strip()
+                    status = input("Variance status (under/over/exact): ").strip().lower()
+                    order = input("Sort by (id/date/amount): ").strip().lower() or None
+                    descending = order is not None and input("Descending? (y/n): ").strip().lower() == "y"
+                    limit = input("Show at most how many rows: ").strip()
+                    try:
+                        rows = Transaction.filter(
+                            user=user, category=category, start=start, end=end,
+                            min_amount=float(min_amt) if min_amt else None,
+                            max_amount=float(max_amt) if max_amt else None,
+                            status=status, order=order, descending=descending,
+                            limit=int(limit) if limit else None)
+                    except ValueError as e:
+                        print(f"Invalid input: {e}")
+                        continue
+                    print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
+                                [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
+
                 else:
-                    print("Invalid selection.")
-                    continue
-                q = f'''
-                    SELECT t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date
-                    FROM transactions t
-                    JOIN users u ON t.user_id = u.id
-                    JOIN categories c ON t.category_id = c.id
-                    WHERE {condition}
-                '''
-                rows = CURSOR.execute(q).fetchall()
-                print_table(["ID", "User", "Category", "Actual", "Budget", "Variance", "Date"],
-                            [[r[0], r[1], r[2], f"KES {r[3]:,.2f}", f"KES {r[4]:,.2f}", f"KES {r[5]:,.2f}", r[6]] for r in rows])
+                    # Back or invalid -> return to main menu
+                    pass
 
-            else:
-                # Back or invalid -> return to main menu
-                pass
+            # ---------------- Budget Limits & Alerts ----------------
+            elif choice == "14":
+                print("\n--- BUDGET LIMITS & ALERTS ---")
+                print("1. Set a Limit")
+                print("2. View Spending Against Limits")
+                print("3. View Recent Alerts")
+                print("4. Remove a Limit")
+                print("5. Back to Main Menu")
+                sub_choice = input("\nSelect an option: ").strip()
+
+                # Set (or replace) a limit
+                if sub_choice == "1":
+                    print_table(["User ID", "Name"], [[u.id, u.name] for u in User.get_all()])
+                    print_table(["Category ID", "Category"], [[c.id, c.name] for c in Category.get_all()])
+                    try:
+                        user_id = int(input("\nEnter user ID: "))
+                        category_id = int(input("Enter category ID: "))
+                        amount = float(input("Enter the limit: "))
+                        period = input("Period - month or year [month]: ").strip().lower() or "month"
+                        percents = input("Alert at percentages [80,100]: ").strip() or "80,100"
+                        if User.get(user_id) is None or Category.get(category_id) is None:
+                            print("Unknown user or category ID.")
+                            continue
+                        BudgetLimit(user_id, category_id, amount, period,
+                                    [float(p) / 100 for p in percents.split(",")]).save()
+                        print("Budget limit saved.")
+                    except ValueError as e:
+                        print(f"Invalid input: {e}")
 
-        else:
-            print("Invalid choice. Please enter a number between 1 and 13.")
+                # Spending this period against every limit
+                elif sub_choice == "2":
+                    print_table(*alerts.status())
+
+                # Recent alerts
+                elif sub_choice == "3":
+                    print_table(*alerts.history())
+
+                # Remove a limit
+                elif sub_choice == "4":
+                    print_table(*alerts.status())
+                    try:
+                        lid = int(input("Enter limit ID to remove: "))
+                        if input("Are you sure? (y/n): ").lower() == "y":
+                            BudgetLimit.delete(lid)
+                            print("Budget limit removed.")
+                    except ValueError:
+                        print("Invalid ID.")
+
+            else:
+                print("Invalid choice. Please enter a number between 1 and 14.")
@@ -0,0 +1,569 @@
+# lib/commands.py
+# Non-interactive commands, run as `python3 main.py <command> [options]`.
+# Running main.py without a command still opens the interactive menu.
+#
+# Commands are meant for scripts and cron jobs: results go to stdout as JSON
+# (default), NDJSON, CSV or a text table, messages go to stderr, and the exit
+# code is 0 on success, 1 on failure. Each command imports only what it needs
+# so a one-shot call starts quickly.
+
+import argparse
+import contextlib
+import sys
+
+FORMATS = ["json", "ndjson", "csv", "table"]
+TRANSACTION_COLUMNS = ["id", "user", "category", "amount", "budgeted_amount", "variance", "date"]
+SUMMARY_COLUMNS = ["name", "total_amount", "total_budget", "total_variance"]
+
+
+def emit(columns, rows, fmt, out=None):
+    """Write rows (sequences matching `columns`) to stdout in the chosen format.
+
+    `rows` may be any iterable; json collects them, the other formats stream.
+    """
+    out = out or sys.stdout
+    if fmt == "json":
+        import json
+        json.dump([dict(zip(columns, r)) for r in rows], out)
+        out.write("\n")
+    elif fmt == "ndjson":
+        import json
+        for r in rows:
+            out.write(json.dumps(dict(zip(columns, r))) + "\n")
+    elif fmt == "csv":
+        import csv
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        from lib.cli import print_table_stream
+        with contextlib.redirect_stdout(out):
+            print_table_stream(columns, rows)
+
+
+def _fail(message):
+    print(message, file=sys.stderr)
+    return 1
+
+
+def _positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive whole number, got {text!r}")
+    return value
+
+
+def cmd_add(args):
+    """Add a user or category and print its id."""
+    if not args.name.strip():
+        return _fail("Name cannot be empty.")
+    if args.kind == "user":
+        from lib.models.user import User as Model
+    else:
+        from lib.models.category import Category as Model
+    obj = Model(args.name.strip())
+    obj.save()
+    emit(["id", "name"], [(obj.id, obj.name)], args.format)
+    return 0
+
+
+def cmd_record(args):
+    """Record one transaction; user/category may be given by id or name."""
+    from lib.importer import parse_record
+    from lib.models.user import User
+    from lib.models.category import Category
+    from lib.models.transaction import Transaction
+
+    record = {"amount": args.amount, "budgeted_amount": args.budget, "date": args.date}
+    for key, value in (("user", args.user), ("category", args.category)):
+        record[f"{key}_id" if value.isdigit() else key] = value
+    try:
+        user_id, category_id, amount, budgeted, _, date = parse_record(
+            record, User.lookup(), Category.lookup())
+    except ValueError as e:
+        return _fail(f"Invalid transaction: {e}")
+    t = Transaction(user_id, category_id, amount, budgeted, date)
+    for alert in t.save():
+        print(f"Budget alert: {alert.message()}", file=sys.stderr)
+    emit(["id", "user_id", "category_id", "amount", "budgeted_amount", "variance", "date"],
+         [(t.id, t.user_id, t.category_id, t.amount, t.budgeted_amount, t.variance, t.date)], args.format)
+    return 0
+
+
+def cmd_list(args):
+    """List transactions one page at a time, or every page with --all."""
+    from lib.models.transaction import Transaction
+
+    try:
+        if args.all:
+            def pages():
+                cursor = None
+                while True:
+                    rows, cursor = Transaction.get_page(cursor, args.page_size, args.order)
+                    yield from rows
+                    if cursor is None:
+                        return
+            emit(TRANSACTION_COLUMNS, pages(), args.format)
+            return 0
+        rows, cursor = Transaction.get_page(args.cursor, args.page_size, args.order)
+    except ValueError as e:
+        return _fail(str(e))
+    emit(TRANSACTION_COLUMNS, rows, args.format)
+    if cursor:
+        print(f"next_cursor: {cursor}", file=sys.stderr)
+    return 0
+
+
+def cmd_report(args):
+    """Category or user summary report."""
+    from lib.reports import category_summary, user_summary
+
+    rows = category_summary() if args.by == "categories" else user_summary()
+    emit(SUMMARY_COLUMNS, rows, args.format)
+    return 0
+
+
+def cmd_search(args):
+    """Search or filter transactions, like menu option 13."""
+    from lib.models.transaction import Transaction
+
+    if args.by == "filter":
+        try:
+            rows = Transaction.filter(
+                user=args.user, category=args.category, prefix=args.prefix, start=args.start, end=args.end,
+                min_amount=args.min, max_amount=args.max, status=args.status,
+                order=args.order, descending=args.desc, limit=args.limit)
+        except ValueError as e:
+            return _fail(str(e))
+    elif args.by == "user":
+        rows = Transaction.search_by_user(args.text, prefix=args.prefix)
+    elif args.by == "category":
+        rows = Transaction.search_by_category(args.text, prefix=args.prefix)
+    elif args.by == "date":
+        rows = Transaction.search_by_date(args.start, args.end)
+    elif args.by == "amount":
+        rows = Transaction.search_by_amount(args.min, args.max)
+    else:
+        rows = Transaction.search_by_status(args.status)
+    emit(TRANSACTION_COLUMNS, rows, args.format)
+    return 0
+
+
+def cmd_delete(args):
+    """Delete a transaction, or a user/category that has no transactions."""
+    if args.kind == "transaction":
+        from lib.models.transaction import Transaction
+        deleted = Transaction.delete(args.id)
+        if not deleted:
+            print(f"No transaction with id {args.id}.", file=sys.stderr)
+    else:
+        if args.kind == "user":
+            from lib.models.user import User as Model
+        else:
+            from lib.models.category import Category as Model
+        # The model explains a refusal on stdout; keep stdout for results only
+        with contextlib.redirect_stdout(sys.stderr):
+            deleted = Model.delete(args.id, cascade=args.cascade)
+    emit(["kind", "id", "deleted"], [(args.kind, args.id, deleted)], args.format)
+    return 0 if deleted else 1
+
+
+def cmd_purge(args):
+    """Delete transactions in bulk by id list, date range, user and/or category."""
+    from lib.models.transaction import Transaction
+
+    ids = None
+    if args.ids:
+        try:
+            ids = [int(part) for part in args.ids.split(",") if part.strip()]
+        except ValueError:
+            return _fail(f"Invalid id list {args.ids!r} (expected comma-separated numbers).")
+    try:
+        deleted = Transaction.purge(ids, args.start, args.end, args.user_id, args.category_id, args.chunk_size)
+    except ValueError as e:
+        return _fail(str(e))
+    emit(["deleted"], [(deleted,)], args.format)
+    return 0
+
+
+def cmd_import(args):
+    """Bulk-import transactions from a CSV or JSONL file."""
+    from lib.importer import import_file
+
+    try:
+        result = import_file(args.path, reject_path=args.rejects, batch_size=args.batch_size)
+    except UnicodeDecodeError as e:
+        # Batches before the bad bytes are already committed
+        return _fail(f"Import stopped: {args.path} is not valid UTF-8 ({e.reason} at byte {e.start}); "
+                     f"rows before that point were imported.")
+    except OSError as e:
+        return _fail(f"Cannot import: {e.filename or args.path}: {e.strerror or e}")
+    print(f"Imported {result['inserted']:,} transactions in {result['seconds']:.2f}s "
+          f"({result['rows_per_second']:,.0f} rows/s).", file=sys.stderr)
+    if result["rejected"]:
+        where = f" (see {args.rejects})" if args.rejects else ""
+        print(f"Rejected {result['rejected']:,} rows{where}.", file=sys.stderr)
+    for alert in result["alerts"]:
+        print(f"Budget alert: {alert.message()}", file=sys.stderr)
+    return 0
+
+
+def cmd_rebuild_rollups(args):
+    """Verify the summary rollups and regenerate them if needed (or always, without --verify)."""
+    from lib.reports import verify_rollups, rebuild_rollups
+
+    if args.verify:
+        mismatches = verify_rollups()
+        if not mismatches:
+            print("Summary rollups are up to date.", file=sys.stderr)
+            return 0
+        print(f"{len(mismatches)} rollup group(s) differ from the transactions table:", file=sys.stderr)
+        for user_id, category_id, month, stored, expected in mismatches[:20]:
+            print(f"  user {user_id}, category {category_id}, month {month or '?'}: "
+                  f"stored {stored}, expected {expected}", file=sys.stderr)
+        if not args.fix:
+            return 1
+    groups = rebuild_rollups()
+    print(f"Summary rollups rebuilt ({groups:,} groups).", file=sys.stderr)
+    return 0
+
+
+def cmd_export(args):
+    """Stream (filtered) transactions to a CSV or NDJSON file, or stdout."""
+    from lib.export import export_transactions
+
+    try:
+        stats = export_transactions(
+            args.output, args.format, compress=True if args.gzip else None,
+            user=args.user, category=args.category, prefix=args.prefix, start=args.start, end=args.end,
+            min_amount=args.min, max_amount=args.max, status=args.status)
+    except ValueError as e:
+        return _fail(str(e))
+    except OSError as e:
+        return _fail(f"Cannot write {args.output or 'stdout'}: {e.strerror or e}")
+    print(f"Exported {stats['rows']:,} transactions ({stats['bytes'] / 1e6:,.1f} MB) in {stats['seconds']:.2f}s: "
+          f"{stats['rows_per_second']:,.0f} rows/s, {stats['bytes_per_second'] / 1e6:,.1f} MB/s.", file=sys.stderr)
+    return 0
+
+
+def cmd_statements(args):
+    """Render monthly statements for every active user (or --user-id) with a process pool."""
+    import re
+    from lib.statements import generate_statements
+
+    if not re.fullmatch(r"\d{4}-\d{2}", args.month):
+        return _fail(f"Invalid month {args.month!r} (expected YYYY-MM).")
+
+    def progress(done, total):
+        print(f"\r{done:,}/{total:,} statements", end="", file=sys.stderr, flush=True)
+
+    stats = generate_statements(args.month, args.out, args.workers, args.user_id,
+                                None if args.quiet else progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Wrote {stats['statements']:,} statements to {args.out} in {stats['seconds']:.2f}s "
+          f"with {stats['workers']} worker(s) ({stats['statements_per_second']:,.0f}/s).", file=sys.stderr)
+    return 0
+
+
+def cmd_archive(args):
+    """Move old transactions into per-year archive files, or list the archives."""
+    from lib import archive
+
+    if args.before:
+        from datetime import date
+        try:
+            date.fromisoformat(args.before)
+        except ValueError:
+            return _fail(f"Invalid date {args.before!r} (expected YYYY-MM-DD).")
+        moved = archive.archive(args.before)
+        for year, count in moved.items():
+            print(f"Archived {count:,} transactions from {year} to {archive.archive_path(year)}", file=sys.stderr)
+        if args.vacuum:
+            from lib.database import get_connection
+            get_connection().execute("VACUUM")
+    headers, rows = archive.summary()
+    if args.format != "table":
+        headers = [h.lower() for h in headers]
+    emit(headers, rows, args.format)
+    return 0
+
+
+def cmd_bench(args):
+    """Run the benchmark suite on a synthetic dataset and print JSON results."""
+    from lib.benchmark import run_benchmarks, write_results
+
+    results = run_benchmarks(users=args.users, categories=args.categories,
+                             transactions=args.transactions, seed=args.seed,
+                             repeat=args.repeat, only=args.only, db_path=args.db)
+    write_results(results, args.output)
+    return 0
+
+
+def cmd_analyze(args):
+    """Trend, rolling-window, grouped and quantile analytics over transactions."""
+    from lib import analytics
+
+    try:
+        cols = analytics.load(args.start, args.end, args.user_id, args.category_id)
+        if args.report == "summary":
+            headers, rows = analytics.summary(cols, args.by)
+        elif args.report == "trend":
+            headers, rows = analytics.trend(cols, args.freq)
+        elif args.report == "rolling":
+            headers, rows = analytics.rolling(cols, args.window, args.freq)
+        else:
+            headers, rows = analytics.quantiles(cols, args.by, args.field, args.q or (0.1, 0.5, 0.9))
+    except ValueError as e:
+        return _fail(str(e))
+    if args.format != "table":
+        headers = [h.lower().replace(" ", "_") for h in headers]
+    emit(headers, rows, args.format)
+    return 0
+
+
+def cmd_budget(args):
+    """Set, list or remove budget limits, or list the alerts they raised."""
+    from lib import alerts
+    from lib.models.budget_limit import BudgetLimit
+
+    if args.action == "set":
+        from lib.models.user import User
+        from lib.models.category import Category
+        if User.get(args.user_id) is None or Category.get(args.category_id) is None:
+            return _fail("Unknown user or category id.")
+        try:
+            limit = BudgetLimit(args.user_id, args.category_id, args.limit, args.period,
+                                [p / 100 for p in args.threshold or (80, 100)])
+        except ValueError as e:
+            return _fail(str(e))
+        limit.save()
+        emit(["id", "user_id", "category_id", "period", "limit_amount", "thresholds"],
+             [(limit.id, limit.user_id, limit.category_id, limit.period, limit.limit_amount,
+               ",".join(f"{t:.0%}" for t in limit.thresholds))], args.format)
+        return 0
+    if args.action == "remove":
+        if BudgetLimit.get(args.id) is None:
+            return _fail(f"No budget limit with id {args.id}.")
+        BudgetLimit.delete(args.id)
+        emit(["id", "deleted"], [(args.id, True)], args.format)
+        return 0
+    try:
+        headers, rows = alerts.status(args.on) if args.action == "status" else alerts.history(args.limit)
+    except ValueError as e:
+        return _fail(f"Invalid date: {e}")
+    if args.format != "table":
+        headers = [h.lower() for h in headers]
+    emit(headers, rows, args.format)
+    return 0
+
+
+def cmd_serve(args):
+    """Run the HTTP/JSON API server."""
+    from lib.server import serve
+
+    serve(args.host, args.port, args.readers, args.max_pending, args.batch)
+    return 0
+
+
+def cmd_loadtest(args):
+    """Send a read/write request mix to a running server and print JSON results."""
+    from lib.loadtest import run_load_test
+    from lib.benchmark import write_results
+
+    write_results(run_load_test(args.url, args.concurrency, args.requests, args.seed), args.output)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Expense Tracker & Budget Monitor")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--format", choices=FORMATS, default="json", help="output format (default json)")
+
+    p = sub.add_parser("add", parents=[output], help="add a user or category")
+    p.add_argument("kind", choices=["user", "category"])
+    p.add_argument("name")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("record", parents=[output], help="record a transaction")
+    p.add_argument("--user", required=True, help="user id or name")
+    p.add_argument("--category", required=True, help="category id or name")
+    p.add_argument("--amount", required=True, help="actual amount spent")
+    p.add_argument("--budget", required=True, help="budgeted amount")
+    p.add_argument("--date", required=True, help="YYYY-MM-DD")
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser("list", parents=[output], help="list transactions (one page, or --all)")
+    p.add_argument("--page-size", type=_positive_int, default=50)
+    p.add_argument("--cursor", help="next_cursor printed by the previous page")
+    p.add_argument("--order", choices=["id", "date"], default="id")
+    p.add_argument("--all", action="store_true", help="stream every page")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("report", parents=[output], help="summary report by category or user")
+    p.add_argument("by", choices=["categories", "users"])
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("search", help="search or filter transactions")
+    by = p.add_subparsers(dest="by", required=True)
+    q = by.add_parser("user", parents=[output])
+    q.add_argument("text")
+    q.add_argument("--prefix", action="store_true", help="match the start of the name only")
+    q = by.add_parser("category", parents=[output])
+    q.add_argument("text")
+    q.add_argument("--prefix", action="store_true", help="match the start of the name only")
+    q = by.add_parser("date", parents=[output])
+    q.add_argument("start")
+    q.add_argument("end")
+    q = by.add_parser("amount", parents=[output])
+    q.add_argument("min", type=float)
+    q.add_argument("max", type=float)
+    q = by.add_parser("status", parents=[output])
+    q.add_argument("status", choices=["under", "over", "exact"])
+    q = by.add_parser("filter", parents=[output], help="combine any of the filters in one query")
+    q.add_argument("--user", help="users whose name contains this text")
+    q.add_argument("--category", help="categories whose name contains this text")
+    q.add_argument("--prefix", action="store_true", help="match --user/--category at the start of the name")
+    q.add_argument("--start", help="dated on or after YYYY-MM-DD")
+    q.add_argument("--end", help="dated on or before YYYY-MM-DD")
+    q.add_argument("--min", type=float, help="amount at least this")
+    q.add_argument("--max", type=float, help="amount at most this")
+    q.add_argument("--status", choices=["under", "over", "exact"])
+    q.add_argument("--order", choices=["id", "date", "amount"], help="sort by this (default: unsorted)")
+    q.add_argument("--desc", action="store_true", help="sort descending")
+    q.add_argument("--limit", type=int, help="at most this many rows")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("delete", parents=[output], help="delete a transaction, user or category")
+    p.add_argument("kind", choices=["transaction", "user", "category"])
+    p.add_argument("id", type=int)
+    p.add_argument("--cascade", action="store_true", help="also delete a user's/category's transactions")
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser("purge", parents=[output], help="bulk-delete transactions matching all the given criteria")
+    p.add_argument("--ids", help="comma-separated transaction ids")
+    p.add_argument("--start", help="dated on or after YYYY-MM-DD")
+    p.add_argument("--end", help="dated on or before YYYY-MM-DD")
+    p.add_argument("--user-id", type=int)
+    p.add_argument("--category-id", type=int)
+    p.add_argument("--chunk-size", type=_positive_int, default=1000, help="rows deleted per commit (default 1000)")
+    p.set_defaults(func=cmd_purge)
+
+    p = sub.add_parser("import", help="bulk-import transactions from a CSV or JSONL file")
+    p.add_argument("path", help="file with user/category (names or ids), amount, budgeted_amount, date")
+    p.add_argument("--rejects", metavar="FILE", help="write rejected rows to this JSONL file")
+    p.add_argument("--batch-size", type=int, default=10000, help="rows per insert batch (default 10000)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("rebuild-rollups", help="regenerate (or --verify) the summary report rollups")
+    p.add_argument("--verify", action="store_true", help="only check the rollups; exit 1 if they differ")
+    p.add_argument("--fix", action="store_true", help="with --verify, rebuild when a difference is found")
+    p.set_defaults(func=cmd_rebuild_rollups)
+
+    p = sub.add_parser("export", help="stream transactions to CSV or NDJSON")
+    p.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    p.add_argument("--output", metavar="FILE", help="write here instead of stdout (.gz is gzipped)")
+    p.add_argument("--gzip", action="store_true", help="gzip the output")
+    p.add_argument("--user", help="users whose name contains this text")
+    p.add_argument("--category", help="categories whose name contains this text")
+    p.add_argument("--prefix", action="store_true", help="match --user/--category at the start of the name")
+    p.add_argument("--start", help="dated on or after YYYY-MM-DD")
+    p.add_argument("--end", help="dated on or before YYYY-MM-DD")
+    p.add_argument("--min", type=float, help="amount at least this")
+    p.add_argument("--max", type=float, help="amount at most this")
+    p.add_argument("--status", choices=["under", "over", "exact"])
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("statements", help="render monthly statements per user")
+    p.add_argument("month", help="YYYY-MM")
+    p.add_argument("--out", default="statements", help="output directory (default ./statements)")
+    p.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    p.add_argument("--user-id", type=int, action="append", help="only this user (repeatable)")
+    p.add_argument("--quiet", action="store_true", help="no progress output")
+    p.set_defaults(func=cmd_statements)
+
+    p = sub.add_parser("archive", parents=[output], help="move old transactions into per-year archive files")
+    p.add_argument("--before", metavar="DATE", help="archive transactions dated before this YYYY-MM-DD "
+                                                    "(without it, just list the archives)")
+    p.add_argument("--vacuum", action="store_true", help="compact the main database afterwards")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("analyze", parents=[output], help="trends, rolling windows and quantiles")
+    p.add_argument("report", choices=["summary", "trend", "rolling", "quantiles"])
+    p.add_argument("--by", choices=["category", "user"], default="category", help="grouping for summary/quantiles")
+    p.add_argument("--freq", choices=["day", "week", "month"], default="month", help="period for trend/rolling")
+    p.add_argument("--window", type=int, default=3, help="periods per rolling window (default 3)")
+    p.add_argument("--field", choices=["amount", "budgeted_amount", "variance"], default="variance",
+                   help="column for quantiles (default variance)")
+    p.add_argument("--q", type=float, action="append", help="quantile to compute, 0-1 (repeatable)")
+    p.add_argument("--start", help="only transactions on or after this date")
+    p.add_argument("--end", help="only transactions on or before this date")
+    p.add_argument("--user-id", type=int)
+    p.add_argument("--category-id", type=int)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("budget", help="budget limits and the alerts they raise")
+    action = p.add_subparsers(dest="action", required=True)
+    q = action.add_parser("set", parents=[output], help="set (or replace) a limit")
+    q.add_argument("user_id", type=int)
+    q.add_argument("category_id", type=int)
+    q.add_argument("limit", type=float, help="most that may be spent per period")
+    q.add_argument("--period", choices=["month", "year"], default="month")
+    q.add_argument("--threshold", type=float, action="append", metavar="PERCENT",
+                   help="alert at this percentage of the limit (repeatable, default 80 and 100)")
+    q = action.add_parser("status", parents=[output], help="spending against every limit")
+    q.add_argument("--on", help="report the period containing this date (default today)")
+    q = action.add_parser("alerts", parents=[output], help="most recent alerts")
+    q.add_argument("--limit", type=_positive_int, default=50)
+    q = action.add_parser("remove", parents=[output], help="remove a limit")
+    q.add_argument("id", type=int)
+    p.set_defaults(func=cmd_budget)
+
+    p = sub.add_parser("serve", help="run the HTTP/JSON API server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--readers", type=int, default=8, help="read threads/connections (default 8)")
+    p.add_argument("--max-pending", type=int, default=256, help="reads allowed in flight at once")
+    p.add_argument("--batch", type=int, default=500, help="most writes per group commit (default 500)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("loadtest", help="load-test a running API server")
+    p.add_argument("--url", default="http://127.0.0.1:8000")
+    p.add_argument("--concurrency", type=_positive_int, default=50, help="parallel connections (default 50)")
+    p.add_argument("--requests", type=_positive_int, default=10000, help="total requests (default 10000)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", metavar="FILE", help="write JSON here instead of stdout")
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser("bench", help="time every operation on a synthetic dataset")
+    p.add_argument("--transactions", type=int, default=10000, help="rows to generate (default 10000)")
+    p.add_argument("--users", type=int, default=50)
+    p.add_argument("--categories", type=int, default=15)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--repeat", type=_positive_int, default=5, help="timed runs per operation (default 5)")
+    p.add_argument("--only", action="append", metavar="NAME", help="only operations whose name contains NAME")
+    p.add_argument("--db", help="generate into (or reuse) this file instead of a temporary one")
+    p.add_argument("--output", metavar="FILE", help="write JSON here instead of stdout")
+    p.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def run(argv):
+    """Parse `argv`, bring the schema up to date and run the selected command.
+
+    Returns an exit code. When the schema is current, create_tables() is a
+    single PRAGMA read.
+    """
+    args = build_parser().parse_args(argv)
+    from lib.database import create_tables
+    from lib.instrumentation import section
+    create_tables()
+    with section(f"command {args.command}"):
+        return args.func(args)
@@ -1,18 +1,156 @@
 # lib/database.py
-# Handles database connection and table creation using SQLite3.
-# A standalone database file 'database.db' is created in the project root.
+# Handles database connections, table creation and schema migrations using SQLite3.
+# A standalone database file 'database.db' is created in the project root
+# (set EXPENSE_TRACKER_DB to use another file).
+#
+# Every thread gets its own connections: a read-write one for `transaction()`
+# blocks and a read-only one for queries and reports. The database runs in
+# WAL mode, so readers never block the writer and vice versa.
+#
+# The schema version is stored in `PRAGMA user_version`. Each entry in
+# MIGRATIONS runs exactly once, in order, inside its own transaction.
+# To change the schema, append a new step - never edit one that has shipped.
 
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 
-# Connect to a local database file (auto-created if missing)
-CONN = sqlite3.connect("database.db")
-CURSOR = CONN.cursor()
+from lib import instrumentation
+
+DB_PATH = os.environ.get("EXPENSE_TRACKER_DB", "database.db")
+
+# Applied to every connection. journal_mode (set by _enable_wal) is stored in the file,
+# the rest are per-connection.
+PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",      # safe in WAL mode; fsync only at checkpoints
+    "PRAGMA busy_timeout = 5000",       # wait up to 5s for another process's write lock
+    "PRAGMA cache_size = -65536",       # 64 MiB page cache
+    "PRAGMA mmap_size = 268435456",     # memory-map up to 256 MiB of the file
+    "PRAGMA temp_store = MEMORY",
+]
+
+_local = threading.local()
+_lock = threading.Lock()
+_connections = []
+_generation = 0  # bumped by close_all() so every thread reopens its connections
+
+
+def _connect(read_only=False):
+    # isolation_level=None: no implicit transactions, `transaction()` issues BEGIN/COMMIT.
+    # check_same_thread=False only so close_all() can close other threads' connections.
+    factory = instrumentation.InstrumentedConnection if instrumentation.ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False, factory=factory)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    _enable_wal(conn)
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    with _lock:
+        _connections.append(conn)
+    return conn
+
+
+def _enable_wal(conn, attempts=50):
+    """Switch the file to WAL mode unless it already is.
+
+    The switch needs an exclusive lock and SQLite reports "locked" straight
+    away (without the busy timeout) when another process is switching the
+    same new file, so retry briefly until one of them has done it.
+    """
+    for attempt in range(attempts):
+        try:
+            if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                return
+            conn.execute("PRAGMA journal_mode = WAL")
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or attempt == attempts - 1:
+                raise
+            time.sleep(0.05)
+
+
+def _state():
+    """This thread's connection slots, reset if close_all() ran since they were opened."""
+    if getattr(_local, "generation", None) != _generation:
+        _local.generation = _generation
+        _local.conn = _local.read_conn = None
+        _local.depth = 0
+    return _local
+
+
+def get_connection():
+    """Return this thread's read-write connection (opened on first use)."""
+    state = _state()
+    if state.conn is None:
+        state.conn = _connect()
+    return state.conn
+
+
+def get_read_connection():
+    """Return this thread's read-only connection, for listings, searches and reports."""
+    state = _state()
+    if state.read_conn is None:
+        state.read_conn = _connect(read_only=True)
+    return state.read_conn
+
+
+@contextmanager
+def transaction():
+    """Run a block of writes as one transaction on this thread's connection.
+
+        with transaction() as conn:
+            conn.execute("INSERT ...")
+
+    Commits when the block finishes and rolls back if it raises. Nested
+    blocks join the outermost transaction. BEGIN IMMEDIATE takes the write
+    lock up front so two writers can't deadlock upgrading from a read.
+    """
+    conn = get_connection()
+    state = _state()
+    if state.depth:
+        state.depth += 1
+        try:
+            yield conn
+        finally:
+            state.depth -= 1
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    state.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        state.depth = 0
+
+
+def close_all():
+    """Close every connection opened by any thread (e.g. before switching databases)."""
+    global _generation
+    with _lock:
+        for conn in _connections:
+            conn.close()
+        _connections.clear()
+        _generation += 1
+
+
+def configure(path):
+    """Point the app at another database file, closing any open connections."""
+    global DB_PATH
+    close_all()
+    DB_PATH = path
+
+
+def _create_base_tables(conn):
+    """1: users, categories and transactions (IF NOT EXISTS so pre-migration databases adopt it)."""
 
-def create_tables():
-    """Creates all required tables if they don't exist."""
-    
     # Create Users table
-    CURSOR.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL
@@ -20,7 +158,7 @@ def create_tables():
     ''')
 
     # Create Categories table
-    CURSOR.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS categories (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL
@@ -28,7 +166,7 @@ def create_tables():
     ''')
 
     # Create Transactions table with budget, actual, and variance
-    CURSOR.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS transactions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -41,4 +179,201 @@ def create_tables():
             FOREIGN KEY (category_id) REFERENCES categories(id)
         )
     ''')
-    CONN.commit()
+
+
+def _add_txn_date(conn):
+    """2: txn_date holds `date` normalized to YYYY-MM-DD (NULL if unparseable) so it sorts and indexes."""
+    conn.execute("ALTER TABLE transactions ADD COLUMN txn_date TEXT")
+    conn.execute("UPDATE transactions SET txn_date = date(date)")
+
+
+def _add_transaction_indexes(conn):
+    """3: indexes for per-user/per-category date ranges, plain date ranges and amount ranges.
+
+    The user and category indexes carry the money columns so summaries and
+    the safe-delete checks are answered from the index alone.
+    """
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_date
+        ON transactions (user_id, txn_date, amount, budgeted_amount, variance)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_category_date
+        ON transactions (category_id, txn_date, amount, budgeted_amount, variance)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (txn_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount)")
+
+
+# Rebuilds summary_rollups from scratch; shared by migration 4 and `rebuild-rollups`
+ROLLUP_REBUILD_SQL = '''
+    INSERT INTO summary_rollups
+        (user_id, category_id, month, txn_count, total_amount, total_budget, total_variance)
+    SELECT IFNULL(user_id, 0), IFNULL(category_id, 0), IFNULL(substr(txn_date, 1, 7), ''),
+           COUNT(*), SUM(amount), SUM(budgeted_amount), SUM(variance)
+    FROM transactions
+    GROUP BY 1, 2, 3
+'''
+
+
+def _add_summary_rollups(conn):
+    """4: per user/category/month totals, kept current by triggers on transactions.
+
+    The summary reports read these instead of aggregating every transaction.
+    Rows with a NULL user/category/date are grouped under 0/0/''.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS summary_rollups (
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            txn_count INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            total_budget REAL NOT NULL,
+            total_variance REAL NOT NULL,
+            PRIMARY KEY (user_id, category_id, month)
+        ) WITHOUT ROWID
+    ''')
+    add_new = '''
+        INSERT INTO summary_rollups
+            (user_id, category_id, month, txn_count, total_amount, total_budget, total_variance)
+        VALUES (IFNULL(NEW.user_id, 0), IFNULL(NEW.category_id, 0), IFNULL(substr(NEW.txn_date, 1, 7), ''),
+                1, IFNULL(NEW.amount, 0), IFNULL(NEW.budgeted_amount, 0), IFNULL(NEW.variance, 0))
+        ON CONFLICT (user_id, category_id, month) DO UPDATE SET
+            txn_count = txn_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            total_budget = total_budget + excluded.total_budget,
+            total_variance = total_variance + excluded.total_variance;
+    '''
+    remove_old = '''
+        UPDATE summary_rollups SET
+            txn_count = txn_count - 1,
+            total_amount = total_amount - IFNULL(OLD.amount, 0),
+            total_budget = total_budget - IFNULL(OLD.budgeted_amount, 0),
+            total_variance = total_variance - IFNULL(OLD.variance, 0)
+        WHERE user_id = IFNULL(OLD.user_id, 0) AND category_id = IFNULL(OLD.category_id, 0)
+          AND month = IFNULL(substr(OLD.txn_date, 1, 7), '');
+        DELETE FROM summary_rollups
+        WHERE user_id = IFNULL(OLD.user_id, 0) AND category_id = IFNULL(OLD.category_id, 0)
+          AND month = IFNULL(substr(OLD.txn_date, 1, 7), '') AND txn_count <= 0;
+    '''
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_rollups_insert AFTER INSERT ON transactions BEGIN {add_new} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_rollups_delete AFTER DELETE ON transactions BEGIN {remove_old} END")
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_rollups_update "
+        "AFTER UPDATE OF user_id, category_id, amount, budgeted_amount, variance, txn_date ON transactions "
+        f"BEGIN {remove_old} {add_new} END"
+    )
+    conn.execute("DELETE FROM summary_rollups")
+    conn.execute(ROLLUP_REBUILD_SQL)
+
+
+def _add_name_search(conn):
+    """5: trigram FTS5 indexes over user and category names, synced by triggers.
+
+    SQLite builds without FTS5 (or without the trigram tokenizer, < 3.34)
+    skip this step; lib/search.py then falls back to LIKE on the base tables.
+    """
+    for table in ("users", "categories"):
+        fts = f"{table}_fts"
+        try:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+                f"USING fts5(name, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+        except sqlite3.OperationalError:
+            return
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, name) VALUES (NEW.id, NEW.name);
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF name ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+                INSERT INTO {fts} (rowid, name) VALUES (NEW.id, NEW.name);
+            END
+        ''')
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _add_budget_limits(conn):
+    """6: spending limits per user/category/period and the alerts raised against them.
+
+    A limit is replaced (new id) rather than updated in place, so the cached
+    copy in lib/models/budget_limit.py notices the change. An alert is
+    recorded at most once per limit, period and threshold.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS budget_limits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            limit_amount REAL NOT NULL,
+            thresholds TEXT NOT NULL,
+            UNIQUE (user_id, category_id, period),
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS budget_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            limit_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            threshold REAL NOT NULL,
+            total_amount REAL NOT NULL,
+            limit_amount REAL NOT NULL,
+            transaction_id INTEGER,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (limit_id, period_key, threshold)
+        )
+    ''')
+
+
+MIGRATIONS = [
+    _create_base_tables,
+    _add_txn_date,
+    _add_transaction_indexes,
+    _add_summary_rollups,
+    _add_name_search,
+    _add_budget_limits,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version():
+    """Return the schema version recorded in the database file."""
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate():
+    """Apply every migration newer than the database's user_version.
+
+    The version is read again once each step holds the write lock, so when
+    several processes start on an old database only the first applies a step.
+    """
+    current = schema_version()
+    for version, step in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        with transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+
+
+def create_tables():
+    """Creates all required tables if they don't exist and brings the schema up to date."""
+    migrate()
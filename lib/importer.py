@@ -0,0 +1,156 @@
+# lib/importer.py
+# Bulk-imports transactions from CSV or JSONL files.
+# Rows are streamed through generators, user/category names are resolved to ids
+# in memory, and inserts are written in large batches with executemany.
+# Rows that cannot be imported are written to a reject file instead of
+# aborting the import.
+
+import csv
+import json
+import sqlite3
+import time
+
+from lib.models.user import User
+from lib.models.category import Category
+from lib.models.transaction import Transaction, normalize_date
+
+BATCH_SIZE = 10000
+
+
+def read_records(path):
+    """Yield (line_number, record) pairs from a .csv or .jsonl/.ndjson file.
+
+    CSV files need a header row. A JSONL line that is not valid JSON is
+    yielded as the raw string so it can be rejected with a reason.
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_no, line
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            # Line 1 is the header, so data starts on line 2
+            for line_no, record in enumerate(csv.DictReader(f), start=2):
+                yield line_no, record
+
+
+def _lookup(record, *keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _resolve(record, name_key, id_key, by_name, ids, label):
+    """Return the id for a user/category given either its name or its id."""
+    ref_id = _lookup(record, id_key)
+    if ref_id is not None:
+        try:
+            ref_id = int(ref_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {id_key} {ref_id!r}")
+        if ref_id not in ids:
+            raise ValueError(f"unknown {label} id {ref_id}")
+        return ref_id
+    name = _lookup(record, name_key)
+    if name is None:
+        raise ValueError(f"missing {name_key} or {id_key}")
+    ref_id = by_name.get(str(name).strip().lower())
+    if ref_id is None:
+        raise ValueError(f"unknown {label} {name!r}")
+    return ref_id
+
+
+def parse_record(record, users, categories):
+    """Turn one input record into an insert tuple or raise ValueError.
+
+    `users` and `categories` are the ({lowercase name: id}, {id: object})
+    lookups returned by User.lookup() / Category.lookup().
+    """
+    if not isinstance(record, dict):
+        raise ValueError("invalid JSON")
+    user_id = _resolve(record, "user", "user_id", users[0], users[1], "user")
+    category_id = _resolve(record, "category", "category_id", categories[0], categories[1], "category")
+    try:
+        amount = float(_lookup(record, "amount", "actual"))
+        budgeted = float(_lookup(record, "budgeted_amount", "budget"))
+    except (TypeError, ValueError):
+        raise ValueError("amount and budgeted_amount must be numbers")
+    date = normalize_date(_lookup(record, "date"))
+    return (user_id, category_id, amount, budgeted, budgeted - amount, date)
+
+
+def _batches(parsed, size):
+    batch = []
+    for item in parsed:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _flush(batch, reject, raised):
+    """Insert one batch; if SQLite refuses it, retry row by row. Returns rows inserted.
+
+    Budget alerts raised by the inserts are appended to `raised`.
+    """
+    rows = [row for _, row in batch]
+    try:
+        raised.extend(Transaction.bulk_insert(rows))
+        return len(rows)
+    except sqlite3.Error:
+        pass  # the batch was rolled back; insert row by row to isolate the bad ones
+    inserted = 0
+    for line_no, row in batch:
+        try:
+            raised.extend(Transaction.bulk_insert([row]))
+            inserted += 1
+        except sqlite3.Error as e:
+            reject(line_no, str(e), row)
+    return inserted
+
+
+def import_file(path, reject_path=None, batch_size=BATCH_SIZE):
+    """Import every record in `path` and return a summary dict.
+
+    Bad records are written as JSON lines to `reject_path` (when given) with
+    the source line number and the reason they were rejected. The budget
+    alerts raised by the import are returned under "alerts".
+    """
+    users = User.lookup()
+    categories = Category.lookup()
+    reject_file = open(reject_path, "w", encoding="utf-8") if reject_path else None
+    counts = {"inserted": 0, "rejected": 0, "alerts": []}
+
+    def reject(line_no, reason, record):
+        counts["rejected"] += 1
+        if reject_file:
+            reject_file.write(json.dumps({"line": line_no, "reason": reason, "record": record}) + "\n")
+
+    def parsed():
+        for line_no, record in read_records(path):
+            try:
+                yield line_no, parse_record(record, users, categories)
+            except ValueError as e:
+                reject(line_no, str(e), record)
+
+    start = time.perf_counter()
+    try:
+        for batch in _batches(parsed(), batch_size):
+            counts["inserted"] += _flush(batch, reject, counts["alerts"])
+    finally:
+        if reject_file:
+            reject_file.close()
+    elapsed = time.perf_counter() - start
+    counts["seconds"] = elapsed
+    counts["rows_per_second"] = counts["inserted"] / elapsed if elapsed > 0 else 0.0
+    return counts
@@ -0,0 +1,302 @@
+# lib/instrumentation.py
+# Opt-in query instrumentation: per-statement timing, slow-query log and
+# EXPLAIN QUERY PLAN capture.
+#
+# When enabled, lib/database.py opens its connections with
+# InstrumentedConnection, which times every execute (including fetching the
+# rows) and groups calls by statement fingerprint - the SQL with literals
+# replaced by ? and whitespace collapsed. Calls slower than the threshold get
+# their query plan captured once per fingerprint, plans that scan a whole
+# table are flagged, and each slow call can be appended to a JSONL log.
+# `section()` attributes query time to a menu option or command.
+#
+# Enable with EXPENSE_TRACKER_PROFILE=1 (text report printed to stderr at
+# exit) or EXPENSE_TRACKER_PROFILE=json (JSON report), optionally with
+# EXPENSE_TRACKER_SLOW_MS (default 100) and EXPENSE_TRACKER_SLOW_LOG=path.jsonl,
+# or call enable() before connecting.
+
+import atexit
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENABLED = False
+SLOW_MS = 100.0
+SLOW_LOG = None
+MAX_SAMPLES = 10000  # latest durations kept per fingerprint for percentiles
+
+_lock = threading.Lock()
+_stats = {}
+_sections = {}
+_local = threading.local()
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalize `sql` so calls that differ only in literals group together."""
+    return _SPACES.sub(" ", _LITERALS.sub("?", sql)).strip()
+
+
+class _Stat:
+    def __init__(self, sql):
+        self.sql = _SPACES.sub(" ", sql).strip()
+        self.calls = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self.plan = None
+        self.full_scan = False
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def _plan(conn, sql, params):
+    """Return (plan lines, full_scan) for `sql`, without recording the EXPLAIN itself."""
+    try:
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return None, False
+    lines = [row[3] for row in rows]
+    # "SCAN t" / "SCAN t USING INDEX" read every row; FTS and constant scans are fine
+    full_scan = any(
+        line.startswith("SCAN ") and "VIRTUAL TABLE" not in line and "CONSTANT ROW" not in line
+        for line in lines
+    )
+    return lines, full_scan
+
+
+def _record(conn, sql, params, elapsed, rows):
+    fp = fingerprint(sql)
+    ms = elapsed * 1000
+    capture = False
+    with _lock:
+        stat = _stats.get(fp)
+        if stat is None:
+            stat = _stats[fp] = _Stat(sql)
+        stat.calls += 1
+        stat.total += elapsed
+        stat.rows += rows
+        stat.samples.append(elapsed)
+        if ms >= SLOW_MS and stat.plan is None and params is not None:
+            stat.plan = []  # claim it so other threads don't also capture
+            capture = True
+        for name in getattr(_local, "sections", ()):
+            section = _sections[name]
+            section["queries"] += 1
+            section["db_seconds"] += elapsed
+    if capture:
+        stat.plan, stat.full_scan = _plan(conn, sql, params)
+    if ms >= SLOW_MS and SLOW_LOG:
+        entry = {"ts": time.time(), "ms": round(ms, 3), "rows": rows, "fingerprint": fp,
+                 "plan": stat.plan, "full_scan": stat.full_scan,
+                 "section": (getattr(_local, "sections", None) or [None])[-1]}
+        with _lock, open(SLOW_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times execute plus the fetches that follow it, per call."""
+
+    _call = None
+
+    def _finish(self):
+        call, self._call = self._call, None
+        if call is not None:
+            _record(self.connection, *call)
+
+    def execute(self, sql, params=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._call = [sql, params, time.perf_counter() - start, 0]
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            # No plan for executemany: there is no single parameter set to explain
+            self._call = [sql, None, time.perf_counter() - start, 0]
+            self._finish()
+
+    def _fetched(self, start, rows, done):
+        if self._call is not None:
+            self._call[2] += time.perf_counter() - start
+            self._call[3] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+@contextmanager
+def section(name):
+    """Attribute wall time and query time inside the block to `name` (e.g. "menu 4")."""
+    if not ENABLED:
+        yield
+        return
+    with _lock:
+        _sections.setdefault(name, {"calls": 0, "queries": 0, "db_seconds": 0.0,
+                                    "samples": deque(maxlen=MAX_SAMPLES)})
+    stack = _local.__dict__.setdefault("sections", [])
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stack.pop()
+        with _lock:
+            _sections[name]["calls"] += 1
+            _sections[name]["samples"].append(time.perf_counter() - start)
+
+
+def enable(slow_ms=None, slow_log=None):
+    """Turn instrumentation on. Connections opened before this are reopened."""
+    global ENABLED, SLOW_MS, SLOW_LOG
+    from lib import database
+
+    ENABLED = True
+    if slow_ms is not None:
+        SLOW_MS = float(slow_ms)
+    if slow_log is not None:
+        SLOW_LOG = slow_log
+    database.close_all()
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _stats.clear()
+        _sections.clear()
+
+
+def report():
+    """Return the recorded statistics as a dict, slowest total time first."""
+    with _lock:
+        statements = []
+        for fp, stat in _stats.items():
+            ordered = sorted(stat.samples)
+            statements.append({
+                "fingerprint": fp,
+                "calls": stat.calls,
+                "rows": stat.rows,
+                "total_ms": stat.total * 1000,
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "p99_ms": _percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "full_scan": stat.full_scan,
+                "plan": stat.plan,
+            })
+        sections = []
+        for name, section in _sections.items():
+            if not section["samples"]:
+                continue
+            ordered = sorted(section["samples"])
+            sections.append({
+                "section": name,
+                "calls": section["calls"],
+                "queries": section["queries"],
+                "db_ms": section["db_seconds"] * 1000,
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            })
+    statements.sort(key=lambda s: s["total_ms"], reverse=True)
+    return {"slow_ms": SLOW_MS, "statements": statements, "sections": sections}
+
+
+def format_report(data=None):
+    """Render report() as readable text."""
+    data = data or report()
+    lines = [f"--- Query profile (plans captured for calls >= {data['slow_ms']:g} ms) ---"]
+    for s in data["statements"]:
+        flag = "  FULL SCAN" if s["full_scan"] else ""
+        lines.append(f"{s['calls']:>7} calls {s['total_ms']:>10.1f} ms total  p50 {s['p50_ms']:.2f}  "
+                     f"p95 {s['p95_ms']:.2f}  p99 {s['p99_ms']:.2f} ms  {s['rows']:>9} rows{flag}")
+        lines.append(f"        {s['fingerprint'][:160]}")
+        for step in s["plan"] or []:
+            lines.append(f"          plan: {step}")
+    if data["sections"]:
+        lines.append("--- Sections ---")
+        for s in data["sections"]:
+            lines.append(f"{s['section']:<20} {s['calls']:>5} calls  p50 {s['p50_ms']:.1f} ms  "
+                         f"max {s['max_ms']:.1f} ms  {s['queries']} queries, {s['db_ms']:.1f} ms in SQLite")
+    return "\n".join(lines)
+
+
+def _print_at_exit():
+    if not (_stats or _sections):
+        return
+    if os.environ.get("EXPENSE_TRACKER_PROFILE") == "json":
+        print(json.dumps(report()), file=sys.stderr)
+    else:
+        print(format_report(), file=sys.stderr)
+
+
+if os.environ.get("EXPENSE_TRACKER_PROFILE"):
+    ENABLED = True
+    SLOW_MS = float(os.environ.get("EXPENSE_TRACKER_SLOW_MS", SLOW_MS))
+    SLOW_LOG = os.environ.get("EXPENSE_TRACKER_SLOW_LOG") or None
+    atexit.register(_print_at_exit)
@@ -0,0 +1,96 @@
+# lib/loadtest.py
+# Local load generator for lib/server.py (standard library only).
+# Opens `concurrency` keep-alive connections and sends a mix of reads and
+# writes as fast as the server answers, then reports throughput and latency
+# percentiles per route.
+
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+from lib.benchmark import percentiles
+
+# (weight, method, path, body factory)
+DEFAULT_MIX = [
+    (30, "GET", "/reports/categories", None),
+    (20, "GET", "/reports/users", None),
+    (20, "GET", "/transactions?page_size=50", None),
+    (10, "GET", "/search/amount?min=100&max=150", None),
+    (5, "GET", "/users", None),
+    (15, "POST", "/transactions", lambda rng, users, categories: {
+        "user_id": rng.choice(users), "category_id": rng.choice(categories),
+        "amount": round(rng.uniform(1, 500), 2), "budgeted_amount": 250, "date": "2025-06-15"}),
+]
+
+
+async def _request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: loadtest\r\nContent-Length: {len(data)}\r\n"
+                 f"Content-Type: application/json\r\n\r\n".encode() + data)
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError(f"server closed the connection during {method} {path}")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _run(url, concurrency, total, mix, seed):
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+
+    reader, writer = await asyncio.open_connection(host, port)
+    users = [u["id"] for u in json.loads((await _request(reader, writer, "GET", "/users"))[1])]
+    categories = [c["id"] for c in json.loads((await _request(reader, writer, "GET", "/categories"))[1])]
+    writer.close()
+    if not users or not categories:
+        raise SystemExit("The server's database needs at least one user and one category.")
+
+    weights = [m[0] for m in mix]
+    samples, errors = {}, {}
+    remaining = [total]
+
+    async def worker(n):
+        rng = random.Random(seed + n)
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                _, method, path, make_body = rng.choices(mix, weights)[0]
+                body = make_body(rng, users, categories) if make_body else None
+                start = time.perf_counter()
+                status, _ = await _request(reader, writer, method, path, body)
+                key = f"{method} {path.split('?')[0]}"
+                samples.setdefault(key, []).append(time.perf_counter() - start)
+                if status >= 400:
+                    errors[key] = errors.get(key, 0) + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done = sum(len(s) for s in samples.values())
+    return {
+        "requests": done,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": done / elapsed if elapsed else 0.0,
+        "overall": percentiles([x for s in samples.values() for x in s]),
+        "routes": {k: dict(percentiles(v), errors=errors.get(k, 0)) for k, v in sorted(samples.items())},
+    }
+
+
+def run_load_test(url="http://127.0.0.1:8000", concurrency=50, requests=10000, seed=42, mix=None):
+    """Drive the server at `url` and return throughput/latency results as a dict."""
+    return asyncio.run(_run(url, concurrency, requests, mix or DEFAULT_MIX, seed))
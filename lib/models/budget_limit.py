@@ -0,0 +1,81 @@
+# lib/models/budget_limit.py
+# Represents a spending limit for one user and category over a month or a
+# year, with the fractions of the limit (e.g. 80% and 100%) that raise alerts.
+
+from lib.database import transaction
+from lib.models.identity_map import IdentityMap
+
+PERIODS = ("month", "year")
+DEFAULT_THRESHOLDS = (0.8, 1.0)
+
+
+class BudgetLimit:
+    __slots__ = ("id", "user_id", "category_id", "period", "limit_amount", "thresholds")
+
+    def __init__(self, user_id, category_id, limit_amount, period="month", thresholds=DEFAULT_THRESHOLDS, id=None):
+        if period not in PERIODS:
+            raise ValueError(f"unknown period {period!r} (expected month or year)")
+        if limit_amount <= 0:
+            raise ValueError("limit must be greater than zero")
+        thresholds = tuple(sorted({float(t) for t in thresholds}))
+        if not thresholds or thresholds[0] <= 0:
+            raise ValueError("thresholds must be greater than zero")
+        self.id = id
+        self.user_id = user_id
+        self.category_id = category_id
+        self.period = period
+        self.limit_amount = limit_amount
+        self.thresholds = thresholds  # fractions of limit_amount, ascending
+
+    def save(self):
+        """Save the limit, replacing any existing one for the same user, category and period."""
+        with transaction() as conn:
+            # REPLACE (not UPDATE) gives the row a new id, so other processes' caches notice
+            self.id = conn.execute(
+                "INSERT OR REPLACE INTO budget_limits (user_id, category_id, period, limit_amount, thresholds) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.user_id, self.category_id, self.period, self.limit_amount,
+                 ",".join(f"{t:g}" for t in self.thresholds))
+            ).lastrowid
+        _limits.invalidate()
+
+    @classmethod
+    def get_all(cls):
+        """Retrieve all limits."""
+        return _limits.all()
+
+    @classmethod
+    def get(cls, limit_id):
+        """Return the limit with this id, or None."""
+        return _limits.get(limit_id)
+
+    @classmethod
+    def by_pair(cls):
+        """Return {(user_id, category_id): [BudgetLimit]} for every pair that has a limit."""
+        global _pairs
+        _, by_id = _limits.lookup()
+        source, pairs = _pairs
+        if source is not by_id:
+            pairs = {}
+            for limit in by_id.values():
+                pairs.setdefault((limit.user_id, limit.category_id), []).append(limit)
+            _pairs = (by_id, pairs)
+        return pairs
+
+    @classmethod
+    def delete(cls, limit_id):
+        """Delete a limit by ID. Alerts it already raised are kept."""
+        with transaction() as conn:
+            conn.execute("DELETE FROM budget_limits WHERE id = ?", (limit_id,))
+        _limits.invalidate()
+
+
+def _load(row):
+    limit_id, user_id, category_id, period, limit_amount, thresholds = row
+    return BudgetLimit(user_id, category_id, limit_amount, period,
+                       [float(t) for t in thresholds.split(",")], id=limit_id)
+
+
+# Cached limits (see identity_map.py), and the same limits indexed by (user_id, category_id)
+_limits = IdentityMap("budget_limits", _load, named=False)
+_pairs = (None, {})
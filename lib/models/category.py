@@ -1,34 +1,68 @@
 # lib/models/category.py
 # Represents a category (e.g., Food, Rent, Utilities) and handles CRUD.
 
-from lib.database import CURSOR, CONN
+from lib import archive
+from lib.database import transaction
+from lib.models.identity_map import IdentityMap
 
 class Category:
+    __slots__ = ("id", "name")
+
     def __init__(self, name, id=None):
         self.id = id
         self.name = name
 
     def save(self):
         """Save a new category."""
-        CURSOR.execute("INSERT INTO categories (name) VALUES (?)", (self.name,))
-        CONN.commit()
-        self.id = CURSOR.lastrowid
+        with transaction() as conn:
+            self.id = conn.execute("INSERT INTO categories (name) VALUES (?)", (self.name,)).lastrowid
+        _categories.invalidate()
 
     @classmethod
     def get_all(cls):
         """Retrieve all categories."""
-        rows = CURSOR.execute("SELECT * FROM categories").fetchall()
-        return [cls(id=row[0], name=row[1]) for row in rows]
+        return _categories.all()
+
+    @classmethod
+    def get(cls, category_id):
+        """Return the category with this id, or None."""
+        return _categories.get(category_id)
+
+    @classmethod
+    def find_by_name(cls, name):
+        """Return the category with this name (case-insensitive, lowest id wins), or None."""
+        return _categories.by_name(name)
 
     @classmethod
-    def delete(cls, category_id):
-        """Delete category only if no transactions are linked."""
-        transactions = CURSOR.execute(
-            "SELECT id FROM transactions WHERE category_id = ?", (category_id,)
-        ).fetchall()
-        if transactions:
-            print("Cannot delete category: transactions exist for this category.")
-            return False
-        CURSOR.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-        CONN.commit()
+    def lookup(cls):
+        """Return ({lowercase name: id}, {id: Category}) for resolving many rows in memory."""
+        return _categories.lookup()
+
+    @classmethod
+    def delete(cls, category_id, cascade=False):
+        """Delete category only if no transactions are linked.
+
+        With cascade=True the category's transactions (archived ones included)
+        are purged first, in chunks, instead of blocking the delete.
+        """
+        if cascade:
+            from lib.models.transaction import Transaction
+            Transaction.purge(category_id=category_id)
+        with transaction() as conn:
+            if cascade:
+                # Anything recorded for the category while the purge ran
+                conn.execute("DELETE FROM transactions WHERE category_id = ?", (category_id,))
+            elif conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM transactions WHERE category_id = ?)", (category_id,)
+            ).fetchone()[0] or archive.has_rows("category_id = ?", (category_id,)):
+                print("Cannot delete category: transactions exist for this category.")
+                return False
+            conn.execute("DELETE FROM budget_alerts WHERE category_id = ?", (category_id,))
+            conn.execute("DELETE FROM budget_limits WHERE category_id = ?", (category_id,))
+            conn.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+        _categories.invalidate()
         return True
+
+
+# Cached categories (see identity_map.py)
+_categories = IdentityMap("categories", lambda row: Category(id=row[0], name=row[1]))
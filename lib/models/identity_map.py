@@ -0,0 +1,71 @@
+# lib/models/identity_map.py
+# Process-wide cache of the small, rarely-changing users and categories tables.
+#
+# Each IdentityMap holds one model object per row, indexed by id and by
+# lowercase name, so resolving ids/names on insert and import paths is a dict
+# lookup. Before answering, it reads `PRAGMA data_version` on the thread's
+# read connection; only when that has moved (some connection committed) does
+# it compare the table's row count and max id, and reloads the table if they
+# changed. save()/delete() also invalidate the map directly.
+#
+# Tables without a name column (budget_limits) pass named=False and skip the
+# name index.
+
+import threading
+
+from lib import database
+
+
+class IdentityMap:
+    def __init__(self, table, load_row, named=True):
+        self.table = table
+        self.load_row = load_row        # row -> model object
+        self.named = named
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._name_ids = {}             # lowercase name -> lowest id with that name
+        self._signature = None          # (COUNT(*), MAX(id)) when last loaded
+        self._checked = None            # (db path, connection, data_version) last verified
+
+    def invalidate(self):
+        """Force the next lookup to reload the table."""
+        with self._lock:
+            self._signature = self._checked = None
+
+    def _fresh(self):
+        conn = database.get_read_connection()
+        checked = (database.DB_PATH, id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+        if checked == self._checked:
+            return
+        signature = conn.execute(f"SELECT COUNT(*), MAX(id) FROM {self.table}").fetchone()
+        with self._lock:
+            if signature != self._signature:
+                by_id, name_ids = {}, {}
+                for row in conn.execute(f"SELECT * FROM {self.table} ORDER BY id"):
+                    obj = by_id[row[0]] = self.load_row(row)
+                    if self.named:
+                        name_ids.setdefault(obj.name.strip().lower(), obj.id)
+                self._by_id, self._name_ids = by_id, name_ids
+                self._signature = signature
+            self._checked = checked
+
+    def all(self):
+        """Every object, in id order."""
+        self._fresh()
+        return list(self._by_id.values())
+
+    def get(self, ref_id):
+        """The object with this id, or None."""
+        self._fresh()
+        return self._by_id.get(ref_id)
+
+    def by_name(self, name):
+        """The lowest-id object with this name (case-insensitive), or None."""
+        self._fresh()
+        ref_id = self._name_ids.get(name.strip().lower())
+        return self._by_id.get(ref_id)
+
+    def lookup(self):
+        """Return ({lowercase name: id}, {id: object}) for resolving many rows at once."""
+        self._fresh()
+        return self._name_ids, self._by_id
@@ -1,9 +1,174 @@
 # lib/models/transaction.py
 # Represents a transaction and handles all related CRUD and data logic.
 
-from lib.database import CURSOR, CONN
+import base64
+import json
+from datetime import date as _date, datetime
+
+from lib import alerts, archive
+from lib.database import transaction
+from lib.search import name_filter
+
+# txn_date is the normalized (YYYY-MM-DD) copy of the date the user typed
+INSERT_SQL = (
+    "INSERT INTO transactions (user_id, category_id, amount, budgeted_amount, variance, date, txn_date) "
+    "VALUES (?1, ?2, ?3, ?4, ?5, ?6, date(?6))"
+)
+
+# Joined view used by listings: (id, user, category, amount, budget, variance, date).
+# {transactions} is filled in by lib/archive.py with the hot table or an archive partition.
+JOINED_COLUMNS = "t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date"
+JOINED_FROM = '''
+    FROM {transactions} t
+    JOIN users u ON t.user_id = u.id
+    JOIN categories c ON t.category_id = c.id
+'''
+SELECT_JOINED = f"SELECT {JOINED_COLUMNS} {JOINED_FROM}"
+
+PAGE_SIZE = 50
+PURGE_CHUNK = 1000  # rows deleted (and committed) per step by purge()
+
+# Variance status -> condition; positive variance = under budget
+STATUS_CONDITIONS = {
+    "under": "t.variance > 0",
+    "over": "t.variance < 0",
+    "exact": "t.variance = 0",
+}
+
+# Sort order -> (ORDER BY columns, extra sort column, merge key over the rows
+# including that column). Undated rows sort first, as in get_page.
+ORDERS = {
+    "id": ("t.id", "", lambda row: row[0]),
+    "date": ("t.txn_date, t.id", ", t.txn_date", lambda row: (row[7] is not None, row[7] or "", row[0])),
+    "amount": ("t.amount, t.id", "", lambda row: (row[3], row[0])),
+}
+
+_query_sql = {}  # query shape -> SQL text, so each shape always sends identical text
+
+
+class TransactionQuery:
+    """Any mix of transaction filters, built into one parameterized query.
+
+    Filters: user/category (name contains `text`, or starts with it when
+    `prefix` is set), user_id/category_id, start/end dates (YYYY-MM-DD,
+    inclusive), min_amount/max_amount and status ("under", "over" or
+    "exact"). `order` is None (no sorting), "id", "date" or "amount";
+    `descending` reverses it and `limit` caps the number of rows.
+
+    Only the filters that are set appear in the WHERE clause, always in the
+    same order and with every value bound as a parameter, so two queries
+    using the same filters share one SQL text and SQLite's statement cache
+    re-uses the compiled statement.
+    """
+
+    def __init__(self, user=None, category=None, prefix=False, user_id=None, category_id=None,
+                 start=None, end=None, min_amount=None, max_amount=None, status=None,
+                 order=None, descending=False, limit=None):
+        if status and status not in STATUS_CONDITIONS:
+            raise ValueError(f"unknown status {status!r} (expected under, over or exact)")
+        if order is not None and order not in ORDERS:
+            raise ValueError(f"unknown order {order!r} (expected id, date or amount)")
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit cannot be negative, got {limit}")
+        self.user, self.category, self.prefix = user, category, prefix
+        self.user_id, self.category_id = user_id, category_id
+        self.start, self.end = start or None, end or None
+        self.min_amount, self.max_amount = min_amount, max_amount
+        self.status = status or None
+        self.order, self.descending, self.limit = order, descending, limit
+
+    def where(self):
+        """Return (clause, params): the WHERE clause (or "") and its values."""
+        conditions, params = [], []
+        if self.user:
+            sql, values = name_filter("users", self.user, self.prefix)
+            conditions.append(f"t.user_id IN ({sql})")
+            params += values
+        if self.user_id is not None:
+            conditions.append("t.user_id = ?")
+            params.append(self.user_id)
+        if self.category:
+            sql, values = name_filter("categories", self.category, self.prefix)
+            conditions.append(f"t.category_id IN ({sql})")
+            params += values
+        if self.category_id is not None:
+            conditions.append("t.category_id = ?")
+            params.append(self.category_id)
+        if self.start:
+            conditions.append("t.txn_date >= date(?)")
+            params.append(self.start)
+        if self.end:
+            conditions.append("t.txn_date <= date(?)")
+            params.append(self.end)
+        if self.min_amount is not None:
+            conditions.append("t.amount >= ?")
+            params.append(self.min_amount)
+        if self.max_amount is not None:
+            conditions.append("t.amount <= ?")
+            params.append(self.max_amount)
+        if self.status:
+            conditions.append(STATUS_CONDITIONS[self.status])
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def sql(self):
+        """Return (sql, params) for the joined view; `sql` reads `{transactions}` (see lib/archive.py)."""
+        where, params = self.where()
+        # The shape is what the text depends on: which filters are set, how names match, the order
+        shape = (where, self.order, self.descending, self.limit is not None)
+        if shape not in _query_sql:
+            sql = f"SELECT {JOINED_COLUMNS}"
+            if self.order:
+                columns, extra, _ = ORDERS[self.order]
+                direction = " DESC" if self.descending else ""
+                sql += f"{extra} {JOINED_FROM}{where} ORDER BY " + ", ".join(
+                    c + direction for c in columns.split(", "))
+            else:
+                sql += f" {JOINED_FROM}{where}"
+            if self.limit is not None:
+                sql += " LIMIT ?"
+            _query_sql[shape] = sql
+        return _query_sql[shape], params + ([self.limit] if self.limit is not None else [])
+
+    def all(self):
+        """Run the query over the main table and every archive year it can touch."""
+        sql, params = self.sql()
+        key = ORDERS[self.order][2] if self.order else None
+        rows = archive.query(sql, params, self.start, self.end, key=key, limit=self.limit,
+                             reverse=self.descending)
+        return [row[:7] for row in rows] if self.order == "date" else rows
+
+
+def normalize_date(text):
+    """Return `text` as a zero-padded YYYY-MM-DD date, or raise ValueError.
+
+    SQLite's date() (which fills txn_date) returns NULL for forms like
+    "2025-3-9", so every write path stores the padded form.
+    """
+    text = str(text or "").strip()
+    try:
+        return _date.fromisoformat(text).isoformat()
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date {text!r} (expected YYYY-MM-DD)")
+
+
+def _encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(token):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"invalid page cursor {token!r}")
+
 
 class Transaction:
+    __slots__ = ("id", "user_id", "category_id", "amount", "budgeted_amount", "variance", "date")
+
     def __init__(self, user_id, category_id, amount, budgeted_amount, date, id=None):
         self.id = id
         self.user_id = user_id
@@ -11,30 +176,176 @@ class Transaction:
         self.amount = amount
         self.budgeted_amount = budgeted_amount
         self.variance = budgeted_amount - amount  # positive = under budget
-        self.date = date
+        self.date = normalize_date(date)
 
     def save(self):
-        """Save a new transaction to the database."""
-        CURSOR.execute(
-            "INSERT INTO transactions (user_id, category_id, amount, budgeted_amount, variance, date) VALUES (?, ?, ?, ?, ?, ?)",
-            (self.user_id, self.category_id, self.amount, self.budgeted_amount, self.variance, self.date)
-        )
-        CONN.commit()
-        self.id = CURSOR.lastrowid
+        """Save a new transaction to the database. Returns the budget alerts it raised."""
+        row = (self.user_id, self.category_id, self.amount, self.budgeted_amount, self.variance, self.date)
+        with transaction() as conn:
+            self.id = conn.execute(INSERT_SQL, row).lastrowid
+            raised = alerts.check(conn, [row], self.id)
+        alerts.notify(raised)
+        return raised
+
+    @classmethod
+    def bulk_insert(cls, rows):
+        """Insert many (user_id, category_id, amount, budgeted_amount, variance, date)
+        tuples with a single executemany in one transaction. Returns the budget alerts raised.
+        Raises ValueError (before inserting anything) if a date is not YYYY-MM-DD."""
+        rows = [row[:5] + (normalize_date(row[5]),) for row in rows]
+        with transaction() as conn:
+            conn.executemany(INSERT_SQL, rows)
+            raised = alerts.check(conn, rows)
+        alerts.notify(raised)
+        return raised
 
     @classmethod
     def get_all(cls):
-        """Retrieve all transactions joined with user and category names."""
-        rows = CURSOR.execute('''
-            SELECT t.id, u.name, c.name, t.amount, t.budgeted_amount, t.variance, t.date
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            JOIN categories c ON t.category_id = c.id
-        ''').fetchall()
-        return rows
+        """Retrieve all transactions (archived ones included) joined with user and category names."""
+        return archive.query(f"{SELECT_JOINED} ORDER BY t.id", key=lambda row: row[0])
+
+    @classmethod
+    def get_page(cls, cursor=None, page_size=PAGE_SIZE, order="id"):
+        """Return (rows, next_cursor) for one page of the joined transaction view.
+
+        Uses keyset pagination: `cursor` is the opaque token returned with the
+        previous page (None for the first page), so every page is an index
+        range scan no matter how deep into the table it is. `order` is "id"
+        or "date" (by normalized date, then id; undated rows come first).
+        next_cursor is None on the last page.
+        """
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        if order == "id":
+            where, params = "", []
+            if cursor is not None:
+                last_id = _decode_cursor(cursor)
+                if not isinstance(last_id, int):
+                    raise ValueError(f"invalid page cursor {cursor!r}")
+                where, params = "WHERE t.id > ?", [last_id]
+            order_by, key, start = "t.id", (lambda row: row[0]), None
+        elif order == "date":
+            where, params, start = "", [], None
+            if cursor is not None:
+                try:
+                    last_date, last_id = _decode_cursor(cursor)
+                except (TypeError, ValueError):
+                    raise ValueError(f"invalid page cursor {cursor!r}")
+                if last_date is None:
+                    where = "WHERE (t.txn_date IS NULL AND t.id > ?) OR t.txn_date IS NOT NULL"
+                    params = [last_id]
+                else:
+                    where = "WHERE (t.txn_date, t.id) > (?, ?)"
+                    params = [last_date, last_id]
+                    start = last_date  # archive years before the cursor have nothing left to show
+            order_by = "t.txn_date, t.id"
+            key = lambda row: (row[7] is not None, row[7] or "", row[0])  # NULL dates sort first
+        else:
+            raise ValueError(f"unknown order {order!r} (expected 'id' or 'date')")
+
+        # The sort key (txn_date, id) is fetched as an extra last column; each
+        # partition returns its first page_size + 1 rows and the pages are merged
+        rows = archive.query(
+            f"SELECT {JOINED_COLUMNS}, t.txn_date {JOINED_FROM} {where} ORDER BY {order_by} LIMIT ?",
+            params + [page_size + 1], start=start, key=key, limit=page_size + 1
+        )
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last[0] if order == "id" else [last[7], last[0]])
+        return [row[:7] for row in rows], next_cursor
+
+    @classmethod
+    def filter(cls, **filters):
+        """Transactions matching every filter given; see TransactionQuery for the keywords."""
+        return TransactionQuery(**filters).all()
+
+    @classmethod
+    def search_by_user(cls, text, prefix=False):
+        """Transactions of users whose name contains (or starts with) `text`."""
+        return cls.filter(user=text, prefix=prefix)
+
+    @classmethod
+    def search_by_category(cls, text, prefix=False):
+        """Transactions in categories whose name contains (or starts with) `text`."""
+        return cls.filter(category=text, prefix=prefix)
+
+    @classmethod
+    def search_by_date(cls, start, end):
+        """Transactions dated between `start` and `end` (inclusive, YYYY-MM-DD).
+
+        Only the archive years inside the range are read.
+        """
+        return cls.filter(start=start, end=end)
+
+    @classmethod
+    def search_by_amount(cls, min_amount, max_amount):
+        """Transactions whose actual amount is between the two bounds (inclusive)."""
+        return cls.filter(min_amount=min_amount, max_amount=max_amount)
+
+    @classmethod
+    def search_by_status(cls, status):
+        """Transactions that are "under", "over" or "exact" on budget."""
+        return cls.filter(status=status)
 
     @classmethod
     def delete(cls, transaction_id):
-        """Delete a transaction by ID."""
-        CURSOR.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
-        CONN.commit()
+        """Delete a transaction by ID (archived or not). Returns True if it existed."""
+        return cls.purge(ids=[transaction_id]) > 0
+
+    @classmethod
+    def purge(cls, ids=None, start=None, end=None, user_id=None, category_id=None, chunk_size=PURGE_CHUNK):
+        """Delete every transaction (archived ones included) matching all the given criteria.
+
+        Criteria: a list of ids, a date range (YYYY-MM-DD, inclusive), a user
+        and a category; at least one is required. Rows are deleted and
+        committed `chunk_size` at a time so other writers get a turn between
+        chunks, and summary_rollups is kept in step. Returns the number deleted.
+        """
+        conditions, params = [], []
+        if start:
+            conditions.append("txn_date >= date(?)")
+            params.append(start)
+        if end:
+            conditions.append("txn_date <= date(?)")
+            params.append(end)
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if category_id is not None:
+            conditions.append("category_id = ?")
+            params.append(category_id)
+        if ids is None and not conditions:
+            raise ValueError("purge needs ids, a date range, a user or a category")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+
+        deleted = 0
+        if ids is not None:
+            ids = list(ids)
+            for i in range(0, len(ids), chunk_size):
+                chunk = ids[i:i + chunk_size]
+                where = " AND ".join([f"id IN ({', '.join('?' * len(chunk))})"] + conditions)
+                with transaction() as conn:
+                    gone = {row[0] for row in conn.execute(
+                        f"DELETE FROM transactions WHERE {where} RETURNING id", chunk + params)}
+                deleted += len(gone)
+                # Ids not found in the main table may be archived
+                left = [ref_id for ref_id in chunk if ref_id not in gone]
+                if left and archive.partitions(start, end):
+                    where = " AND ".join([f"id IN ({', '.join('?' * len(left))})"] + conditions)
+                    deleted += archive.purge(where, left + params, start, end, chunk_size)
+            return deleted
+
+        where = " AND ".join(conditions)
+        while True:
+            with transaction() as conn:
+                count = conn.execute(
+                    f"DELETE FROM transactions WHERE id IN (SELECT id FROM transactions WHERE {where} LIMIT ?)",
+                    params + [chunk_size]
+                ).rowcount
+            deleted += count
+            if count < chunk_size:
+                break
+        return deleted + archive.purge(where, params, start, end, chunk_size)
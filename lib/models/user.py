@@ -1,34 +1,68 @@
 # lib/models/user.py
 # Represents a user and manages CRUD operations related to users.
 
-from lib.database import CURSOR, CONN
+from lib import archive
+from lib.database import transaction
+from lib.models.identity_map import IdentityMap
 
 class User:
+    __slots__ = ("id", "name")
+
     def __init__(self, name, id=None):
         self.id = id
         self.name = name
 
     def save(self):
         """Save a new user to the database."""
-        CURSOR.execute("INSERT INTO users (name) VALUES (?)", (self.name,))
-        CONN.commit()
-        self.id = CURSOR.lastrowid
+        with transaction() as conn:
+            self.id = conn.execute("INSERT INTO users (name) VALUES (?)", (self.name,)).lastrowid
+        _users.invalidate()
 
     @classmethod
     def get_all(cls):
         """Retrieve all users."""
-        rows = CURSOR.execute("SELECT * FROM users").fetchall()
-        return [cls(id=row[0], name=row[1]) for row in rows]
+        return _users.all()
+
+    @classmethod
+    def get(cls, user_id):
+        """Return the user with this id, or None."""
+        return _users.get(user_id)
+
+    @classmethod
+    def find_by_name(cls, name):
+        """Return the user with this name (case-insensitive, lowest id wins), or None."""
+        return _users.by_name(name)
 
     @classmethod
-    def delete(cls, user_id):
-        """Delete a user safely (only if no transactions are linked)."""
-        transactions = CURSOR.execute(
-            "SELECT id FROM transactions WHERE user_id = ?", (user_id,)
-        ).fetchall()
-        if transactions:
-            print("Cannot delete user: transactions exist for this user.")
-            return False
-        CURSOR.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        CONN.commit()
+    def lookup(cls):
+        """Return ({lowercase name: id}, {id: User}) for resolving many rows in memory."""
+        return _users.lookup()
+
+    @classmethod
+    def delete(cls, user_id, cascade=False):
+        """Delete a user safely (only if no transactions are linked).
+
+        With cascade=True the user's transactions (archived ones included)
+        are purged first, in chunks, instead of blocking the delete.
+        """
+        if cascade:
+            from lib.models.transaction import Transaction
+            Transaction.purge(user_id=user_id)
+        with transaction() as conn:
+            if cascade:
+                # Anything recorded for the user while the purge ran
+                conn.execute("DELETE FROM transactions WHERE user_id = ?", (user_id,))
+            elif conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM transactions WHERE user_id = ?)", (user_id,)
+            ).fetchone()[0] or archive.has_rows("user_id = ?", (user_id,)):
+                print("Cannot delete user: transactions exist for this user.")
+                return False
+            conn.execute("DELETE FROM budget_alerts WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM budget_limits WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        _users.invalidate()
         return True
+
+
+# Cached users (see identity_map.py)
+_users = IdentityMap("users", lambda row: User(id=row[0], name=row[1]))
@@ -0,0 +1,78 @@
+# lib/reports.py
+# Category and User summary reports, read from the summary_rollups table.
+# The rollups hold one row per user/category/month and are kept up to date by
+# triggers on `transactions`, so a report costs time proportional to the
+# number of groups rather than the number of transactions ever recorded.
+# Archived transactions (lib/archive.py) stay counted in the rollups.
+
+from lib import archive
+from lib.database import transaction, get_read_connection, ROLLUP_REBUILD_SQL
+
+# Rollup totals are running float sums, so allow for rounding drift when verifying
+TOLERANCE = 0.005
+
+
+def category_summary():
+    """Return (category name, total actual, total budget, total variance) rows."""
+    return get_read_connection().execute('''
+        SELECT c.name, SUM(r.total_amount), SUM(r.total_budget), SUM(r.total_variance)
+        FROM summary_rollups r
+        JOIN categories c ON r.category_id = c.id
+        GROUP BY c.name
+    ''').fetchall()
+
+
+def user_summary():
+    """Return (user name, total actual, total budget, total variance) rows."""
+    return get_read_connection().execute('''
+        SELECT u.name, SUM(r.total_amount), SUM(r.total_budget), SUM(r.total_variance)
+        FROM summary_rollups r
+        JOIN users u ON r.user_id = u.id
+        GROUP BY u.name
+    ''').fetchall()
+
+
+def verify_rollups():
+    """Compare the rollups with a fresh aggregate of `transactions` and the archives.
+
+    Returns a list of (user_id, category_id, month, stored, expected) tuples
+    for every group that differs; an empty list means the rollups are correct.
+    """
+    conn = get_read_connection()
+    expected = {
+        row[:3]: row[3:]
+        for row in conn.execute('''
+            SELECT IFNULL(user_id, 0), IFNULL(category_id, 0), IFNULL(substr(txn_date, 1, 7), ''),
+                   COUNT(*), SUM(amount), SUM(budgeted_amount), SUM(variance)
+            FROM transactions
+            GROUP BY 1, 2, 3
+        ''')
+    }
+    for user_id, category_id, month, *totals in archive.archived_rollups():
+        have = expected.get((user_id, category_id, month), (0, 0, 0, 0))
+        expected[user_id, category_id, month] = tuple((a or 0) + b for a, b in zip(have, totals))
+    stored = {
+        row[:3]: row[3:]
+        for row in conn.execute('''
+            SELECT user_id, category_id, month, txn_count, total_amount, total_budget, total_variance
+            FROM summary_rollups
+        ''')
+    }
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        have, want = stored.get(key), expected.get(key)
+        if have is None or want is None or have[0] != want[0] or any(
+            abs((a or 0) - (b or 0)) > TOLERANCE for a, b in zip(have[1:], want[1:])
+        ):
+            mismatches.append((*key, have, want))
+    return mismatches
+
+
+def rebuild_rollups():
+    """Regenerate summary_rollups from `transactions` and the archives. Returns the number of groups."""
+    archived = list(archive.archived_rollups())
+    with transaction() as conn:
+        conn.execute("DELETE FROM summary_rollups")
+        conn.execute(ROLLUP_REBUILD_SQL)
+        conn.executemany(archive.ROLLUP_ADD_SQL, archived)
+        return conn.execute("SELECT COUNT(*) FROM summary_rollups").fetchone()[0]
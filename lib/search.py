@@ -0,0 +1,39 @@
+# lib/search.py
+# Substring and prefix search over user and category names.
+# Uses the trigram FTS5 indexes created by migration 5 when this SQLite build
+# has them, and falls back to LIKE on the base table otherwise. Either way the
+# result is a small set of ids that drives an indexed lookup into transactions.
+
+from lib import database
+
+_fts_tables = {}
+
+
+def fts_available(table):
+    """True if `table` ("users" or "categories") has a trigram name index in the current database."""
+    key = (database.DB_PATH, table)
+    if key not in _fts_tables:
+        row = database.get_read_connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"{table}_fts",)
+        ).fetchone()
+        _fts_tables[key] = row is not None
+    return _fts_tables[key]
+
+
+def name_filter(table, text, prefix=False):
+    """Return (sql, params) for a subquery selecting the ids of matching names.
+
+    Matching is case-insensitive; `prefix` matches the start of the name only.
+    Patterns of 3+ characters are answered from the trigram index; shorter ones
+    scan the (small) index or name table.
+    """
+    pattern = f"{text}%" if prefix else f"%{text}%"
+    if fts_available(table):
+        return f"SELECT rowid FROM {table}_fts WHERE name LIKE ?", (pattern,)
+    return f"SELECT id FROM {table} WHERE name LIKE ?", (pattern,)
+
+
+def matching_ids(table, text, prefix=False):
+    """Return the ids in `table` whose name contains (or starts with) `text`."""
+    sql, params = name_filter(table, text, prefix)
+    return [row[0] for row in database.get_read_connection().execute(sql, params)]
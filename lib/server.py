@@ -0,0 +1,374 @@
+# lib/server.py
+# A small asyncio HTTP/JSON API over the expense models (standard library only).
+#
+# Reads (listings, reports, searches) run on a bounded thread pool; each
+# worker thread has its own read-only connection, so the pool doubles as a
+# pool of read connections. Writes go through a single writer: requests are
+# queued, and the writer commits everything waiting in the queue as one
+# transaction (group commit), with a savepoint per request so one bad write
+# does not undo the others.
+#
+# Routes (all responses are JSON):
+#   GET    /users                     POST /users {"name"}          DELETE /users/<id>?cascade=1
+#   GET    /categories                POST /categories {"name"}     DELETE /categories/<id>?cascade=1
+#   GET    /transactions?cursor=&page_size=&order=
+#   POST   /transactions {"user"|"user_id", "category"|"category_id", "amount", "budgeted_amount", "date"}
+#   DELETE /transactions/<id>
+#   GET    /reports/categories        GET /reports/users
+#   GET    /budgets?on=YYYY-MM-DD     GET /alerts?limit=
+#   GET    /search/user?q=&prefix=1   GET /search/category?q=&prefix=1
+#   GET    /search/date?start=&end=   GET /search/amount?min=&max=   GET /search/status?status=
+#   GET    /search?user=&category=&prefix=1&start=&end=&min=&max=&status=&order=&desc=1&limit=
+
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from lib import database, alerts
+from lib.models.user import User
+from lib.models.category import Category
+from lib.models.transaction import Transaction, PAGE_SIZE
+from lib.reports import category_summary, user_summary
+
+MAX_BODY = 1024 * 1024
+TRANSACTION_KEYS = ["id", "user", "category", "amount", "budgeted_amount", "variance", "date"]
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------------------------------------------
+# Writer: one thread, one connection, group commit
+# --------------------------------------------------------------------
+class Writer:
+    """Serializes writes and commits each batch of queued writes together."""
+
+    def __init__(self, max_batch=500):
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer")
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self._run())
+
+    async def submit(self, fn):
+        """Run fn() on the writer thread inside the next group commit; return its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fn, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.executor, self._commit, [fn for fn, _ in batch])
+            except Exception as e:  # the commit itself failed: every write in the batch is lost
+                results = [(False, e)] * len(batch)
+            for (_, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    @staticmethod
+    def _commit(fns):
+        results = []
+        with database.transaction() as conn:
+            for fn in fns:
+                conn.execute("SAVEPOINT api_write")
+                try:
+                    results.append((True, fn()))
+                    conn.execute("RELEASE api_write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO api_write")
+                    conn.execute("RELEASE api_write")
+                    results.append((False, e))
+        return results
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+        self.executor.shutdown(wait=True)
+
+
+# --------------------------------------------------------------------
+# Handlers
+# --------------------------------------------------------------------
+def _rows(keys, rows):
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def _param(query, name, convert=str, default=None):
+    values = query.get(name)
+    if not values:
+        if default is None:
+            raise HTTPError(400, f"missing query parameter '{name}'")
+        return default
+    try:
+        return convert(values[0])
+    except ValueError:
+        raise HTTPError(400, f"invalid value for '{name}'")
+
+
+def _count(query, name, default, maximum=1000):
+    """A positive integer parameter, capped at `maximum`."""
+    value = _param(query, name, int, default)
+    if value < 1:
+        raise HTTPError(400, f"'{name}' must be at least 1")
+    return min(value, maximum)
+
+
+def _optional(query, name, convert=str):
+    """Like _param, but None when the parameter is absent."""
+    return _param(query, name, convert) if query.get(name) else None
+
+
+def _read_route(path, query):
+    """Return a zero-argument function computing the response for a GET, or raise HTTPError."""
+    if path == "/users":
+        return lambda: [{"id": u.id, "name": u.name} for u in User.get_all()]
+    if path == "/categories":
+        return lambda: [{"id": c.id, "name": c.name} for c in Category.get_all()]
+    if path == "/transactions":
+        cursor = query.get("cursor", [None])[0]
+        page_size = _count(query, "page_size", PAGE_SIZE)
+        order = query.get("order", ["id"])[0]
+
+        def page():
+            try:
+                rows, next_cursor = Transaction.get_page(cursor, page_size, order)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            return {"rows": _rows(TRANSACTION_KEYS, rows), "next_cursor": next_cursor}
+        return page
+    if path in ("/reports/categories", "/reports/users"):
+        report = category_summary if path.endswith("categories") else user_summary
+        return lambda: _rows(["name", "total_amount", "total_budget", "total_variance"], report())
+    if path == "/budgets":
+        on = query.get("on", [None])[0]
+
+        def budgets():
+            try:
+                headers, rows = alerts.status(on)
+            except ValueError as e:
+                raise HTTPError(400, f"invalid date: {e}")
+            return _rows([h.lower() for h in headers], rows)
+        return budgets
+    if path == "/alerts":
+        count = _count(query, "limit", 50)
+
+        def recent():
+            headers, rows = alerts.history(count)
+            return _rows([h.lower() for h in headers], rows)
+        return recent
+    if path == "/search":
+        filters = dict(
+            user=_optional(query, "user"), category=_optional(query, "category"),
+            prefix=query.get("prefix", ["0"])[0] in ("1", "true"),
+            start=_optional(query, "start"), end=_optional(query, "end"),
+            min_amount=_optional(query, "min", float), max_amount=_optional(query, "max", float),
+            status=_optional(query, "status"), order=_optional(query, "order"),
+            descending=query.get("desc", ["0"])[0] in ("1", "true"),
+            limit=_count(query, "limit", 1000),
+        )
+
+        def search():
+            try:
+                return _rows(TRANSACTION_KEYS, Transaction.filter(**filters))
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        return search
+    if path.startswith("/search/"):
+        by = path[len("/search/"):]
+        if by in ("user", "category"):
+            text, prefix = _param(query, "q"), query.get("prefix", ["0"])[0] in ("1", "true")
+            search = Transaction.search_by_user if by == "user" else Transaction.search_by_category
+            return lambda: _rows(TRANSACTION_KEYS, search(text, prefix=prefix))
+        if by == "date":
+            start, end = _param(query, "start"), _param(query, "end")
+            return lambda: _rows(TRANSACTION_KEYS, Transaction.search_by_date(start, end))
+        if by == "amount":
+            low, high = _param(query, "min", float), _param(query, "max", float)
+            return lambda: _rows(TRANSACTION_KEYS, Transaction.search_by_amount(low, high))
+        if by == "status":
+            status = _param(query, "status")
+
+            def by_status():
+                try:
+                    return _rows(TRANSACTION_KEYS, Transaction.search_by_status(status))
+                except ValueError as e:
+                    raise HTTPError(400, str(e))
+            return by_status
+    raise HTTPError(404, f"no route for GET {path}")
+
+
+def _create_named(Model, body):
+    name = str(body.get("name") or "").strip()
+    if not name:
+        raise HTTPError(400, "name cannot be empty")
+
+    def create():
+        obj = Model(name)
+        obj.save()
+        return {"id": obj.id, "name": obj.name}
+    return create
+
+
+def _create_transaction(body):
+    from lib.importer import parse_record
+
+    def create():
+        try:
+            user_id, category_id, amount, budgeted, _, date = parse_record(
+                body, User.lookup(), Category.lookup())
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        t = Transaction(user_id, category_id, amount, budgeted, date)
+        raised = t.save()
+        return {"id": t.id, "user_id": t.user_id, "category_id": t.category_id, "amount": t.amount,
+                "budgeted_amount": t.budgeted_amount, "variance": t.variance, "date": t.date,
+                "alerts": [a.as_dict() for a in raised]}
+    return create
+
+
+def _delete(kind, ref_id, cascade=False):
+    def delete():
+        if kind == "transactions":
+            if not Transaction.delete(ref_id):
+                raise HTTPError(404, f"transaction {ref_id} not found")
+            return {"deleted": True, "id": ref_id}
+        Model = User if kind == "users" else Category
+        if not Model.delete(ref_id, cascade=cascade):
+            raise HTTPError(409, f"{kind[:-1]} {ref_id} still has transactions")
+        return {"deleted": True, "id": ref_id}
+    return delete
+
+
+def _write_route(method, path, body, query):
+    """Return a zero-argument function performing the write, or raise HTTPError."""
+    parts = path.strip("/").split("/")
+    if method == "POST" and len(parts) == 1:
+        if not isinstance(body, dict):
+            raise HTTPError(400, "request body must be a JSON object")
+        if parts[0] == "users":
+            return _create_named(User, body)
+        if parts[0] == "categories":
+            return _create_named(Category, body)
+        if parts[0] == "transactions":
+            return _create_transaction(body)
+    if method == "DELETE" and len(parts) == 2 and parts[0] in ("users", "categories", "transactions"):
+        try:
+            return _delete(parts[0], int(parts[1]), query.get("cascade", ["0"])[0] in ("1", "true"))
+        except ValueError:
+            raise HTTPError(400, f"invalid id {parts[1]!r}")
+    raise HTTPError(404 if method in ("POST", "DELETE") else 405, f"no route for {method} {path}")
+
+
+# --------------------------------------------------------------------
+# HTTP plumbing
+# --------------------------------------------------------------------
+class Server:
+    def __init__(self, host="127.0.0.1", port=8000, readers=8, max_pending=256, max_batch=500):
+        self.host, self.port = host, port
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="reader")
+        self.pending = asyncio.Semaphore(max_pending)
+        self.writer = Writer(max_batch)
+
+    async def _respond(self, method, target, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if method == "GET":
+            fn = _read_route(url.path, query)
+            async with self.pending:
+                return 200, await asyncio.get_running_loop().run_in_executor(self.readers, fn)
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            raise HTTPError(400, "request body is not valid JSON")
+        fn = _write_route(method, url.path, payload, query)
+        return (201 if method == "POST" else 200), await self.writer.submit(fn)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    try:
+                        length = int(headers.get("content-length") or 0)
+                    except ValueError:
+                        length = -1
+                    # An unread body would be parsed as the next request, so these close the connection
+                    if length < 0:
+                        keep_alive = False
+                        raise HTTPError(400, "invalid Content-Length header")
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HTTPError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, result = await self._respond(method, target, body)
+                except HTTPError as e:
+                    status, result = e.status, {"error": str(e)}
+                except sqlite3.Error as e:
+                    status, result = 503 if "locked" in str(e) else 500, {"error": str(e)}
+                except Exception as e:
+                    status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+                data = json.dumps(result).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self.writer.start()
+        server = await asyncio.start_server(self.handle, self.host, self.port, backlog=1024)
+        print(f"Serving on http://{self.host}:{self.port}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.writer.close()
+            self.readers.shutdown(wait=False)
+
+
+def serve(host="127.0.0.1", port=8000, readers=8, max_pending=256, max_batch=500):
+    """Run the API server until interrupted."""
+    try:
+        asyncio.run(Server(host, port, readers, max_pending, max_batch).serve())
+    except KeyboardInterrupt:
+        pass
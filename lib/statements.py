@@ -0,0 +1,135 @@
+# lib/statements.py
+# Monthly statements: one text file per user listing the month's
+# transactions, a per-category breakdown and the budget variance.
+#
+# Users are split into small chunks and rendered by a pool of worker
+# processes. Each worker points lib/database at the same database file and
+# reads through its own read-only connection (WAL lets them all read at once
+# while the app keeps writing), so the work scales with the number of cores.
+# Workers are started with "spawn" so none inherits the parent's open
+# SQLite connections.
+
+import contextlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lib import archive, database
+
+CHUNKS_PER_WORKER = 4  # smaller chunks even out the load and make progress smoother
+
+
+def _users_with_activity(month):
+    return [row[0] for row in database.get_read_connection().execute(
+        "SELECT DISTINCT user_id FROM summary_rollups WHERE month = ? AND user_id != 0 ORDER BY user_id", (month,))]
+
+
+def statement_path(out_dir, month, user_id):
+    return os.path.join(out_dir, f"statement_{month}_user_{user_id}.txt")
+
+
+def _money(value):
+    return f"KES {value:,.2f}"
+
+
+def _status(variance):
+    return "Under" if variance > 0 else ("Over" if variance < 0 else "Exact")
+
+
+def render_statement(user, month, out):
+    """Write `user`'s statement for `month` (YYYY-MM) to the text stream `out`."""
+    from lib.cli import print_table
+
+    first, last = f"{month}-01", f"{month}-31"
+    transactions = archive.query('''
+        SELECT t.id, t.txn_date, c.name, t.amount, t.budgeted_amount, t.variance
+        FROM {transactions} t
+        JOIN categories c ON t.category_id = c.id
+        WHERE t.user_id = ? AND t.txn_date BETWEEN ? AND ?
+        ORDER BY t.txn_date, t.id
+    ''', (user.id, first, last), start=first, end=last, key=lambda row: (row[1], row[0]))
+    breakdown = database.get_read_connection().execute('''
+        SELECT c.name, r.txn_count, r.total_amount, r.total_budget, r.total_variance
+        FROM summary_rollups r
+        JOIN categories c ON r.category_id = c.id
+        WHERE r.user_id = ? AND r.month = ?
+        ORDER BY r.total_amount DESC
+    ''', (user.id, month)).fetchall()
+    actual = sum(r[2] for r in breakdown)
+    budget = sum(r[3] for r in breakdown)
+    variance = sum(r[4] for r in breakdown)
+
+    with contextlib.redirect_stdout(out):
+        print(f"MONTHLY STATEMENT - {user.name} - {month}\n")
+        print("Transactions")
+        print_table(["ID", "Date", "Category", "Actual", "Budget", "Variance", "Status"],
+                    [[t[0], t[1], t[2], _money(t[3]), _money(t[4]), _money(t[5]), _status(t[5])]
+                     for t in transactions])
+        print("\nBy Category")
+        print_table(["Category", "Count", "Actual", "Budget", "Variance", "Status"],
+                    [[r[0], r[1], _money(r[2]), _money(r[3]), _money(r[4]), _status(r[4])] for r in breakdown])
+        print(f"\nTotal spent:    {_money(actual)}")
+        print(f"Total budgeted: {_money(budget)}")
+        print(f"Variance:       {_money(variance)} ({_status(variance)})")
+
+
+def _render_chunk(user_ids, month, out_dir):
+    """Worker task: render one statement file per user id. Returns how many were written."""
+    from lib.models.user import User
+
+    written = 0
+    for user_id in user_ids:
+        user = User.get(user_id)
+        if user is None:
+            continue
+        with open(statement_path(out_dir, month, user_id), "w", encoding="utf-8") as f:
+            render_statement(user, month, f)
+        written += 1
+    return written
+
+
+def _init_worker(db_path):
+    database.configure(db_path)
+
+
+def generate_statements(month, out_dir, workers=None, user_ids=None, progress=None):
+    """Render statements for `month` (YYYY-MM) into `out_dir` and return stats.
+
+    Covers `user_ids`, or every user with transactions that month. `workers`
+    defaults to the number of CPUs; 1 renders in this process. `progress`, if
+    given, is called as progress(done, total) as chunks finish.
+    Returns {"statements", "workers", "seconds", "statements_per_second"}.
+    """
+    if user_ids is None:
+        user_ids = _users_with_activity(month)
+    workers = max(1, workers or os.cpu_count() or 1)
+    os.makedirs(out_dir, exist_ok=True)
+    total, done = len(user_ids), 0
+    start = time.perf_counter()
+
+    if workers == 1:
+        for i, user_id in enumerate(user_ids, start=1):
+            done += _render_chunk([user_id], month, out_dir)
+            if progress:
+                progress(i, total)
+    else:
+        size = max(1, -(-total // (workers * CHUNKS_PER_WORKER)))
+        chunks = [user_ids[i:i + size] for i in range(0, total, size)]
+        finished = 0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(os.path.abspath(database.DB_PATH),)) as pool:
+            futures = {pool.submit(_render_chunk, chunk, month, out_dir): len(chunk) for chunk in chunks}
+            for future in as_completed(futures):
+                done += future.result()
+                finished += futures[future]
+                if progress:
+                    progress(finished, total)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "statements": done,
+        "workers": workers,
+        "seconds": elapsed,
+        "statements_per_second": done / elapsed if elapsed > 0 else 0.0,
+    }
@@ -1,10 +1,18 @@
 # main.py
 # Entry point of the Expense Tracker & Budget Monitor application.
-# This file initializes database tables and starts the CLI menu.
+# This file initializes database tables and starts the CLI menu,
+# or runs a single command when one is given (e.g. `python3 main.py report users`).
+# Commands skip the menu imports entirely so scripted calls start quickly.
 
-from lib.database import create_tables
-from lib.cli import main_menu
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from lib.commands import run
+        sys.exit(run(sys.argv[1:]))
+
+    from lib.database import create_tables
+    from lib.cli import main_menu
+
     create_tables()   # Ensure required tables exist
     main_menu()       # Launch the main interactive menu
@@ -0,0 +1,102 @@
+# tests/test_archive.py
+# Checks the invariants that tie the hot table, the per-year archives and
+# summary_rollups together: the rollups must match hot + archived rows after
+# archiving, purging and cascade deletes, and keyset pages must merge across
+# partitions in both orders. Each test runs on its own temporary database.
+#
+# Run from the project root with: python -m unittest discover -s tests -t .
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from lib import archive, database
+from lib.benchmark import generate_dataset
+from lib.models.transaction import Transaction
+from lib.models.user import User
+from lib.reports import verify_rollups
+
+CUTOFF = "2025-01-01"
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory(prefix="expense-test-")
+        self.saved_archive = os.environ.pop("EXPENSE_TRACKER_ARCHIVE", None)
+        self.saved_path = database.DB_PATH
+        # Three years of data, so archiving before CUTOFF leaves two archive years
+        generate_dataset(os.path.join(self.tmpdir.name, "test.db"), users=8, categories=5,
+                         transactions=3000, seed=7, end=date(2025, 12, 31), days=3 * 365)
+
+    def tearDown(self):
+        database.configure(self.saved_path)
+        if self.saved_archive is not None:
+            os.environ["EXPENSE_TRACKER_ARCHIVE"] = self.saved_archive
+        self.tmpdir.cleanup()
+
+    def archive_old(self):
+        moved = archive.archive(CUTOFF)
+        self.assertGreaterEqual(len(moved), 2)
+        self.assertTrue(all(count > 0 for count in moved.values()))
+        return moved
+
+    def assertRollupsConsistent(self):
+        self.assertEqual(verify_rollups(), [])
+
+    def test_archive_keeps_rollups_and_listing(self):
+        before = Transaction.get_all()
+        self.archive_old()
+        self.assertRollupsConsistent()
+        self.assertEqual(Transaction.get_all(), before)
+        hot = database.get_read_connection().execute(
+            "SELECT COUNT(*) FROM transactions WHERE txn_date < ?", (CUTOFF,)).fetchone()[0]
+        self.assertEqual(hot, 0)
+
+    def test_paged_listing_matches_get_all(self):
+        self.archive_old()
+        everything = Transaction.get_all()
+        dates = {row[0]: row[1] for row in archive.query("SELECT id, txn_date FROM {transactions}")}
+        for order, key in (("id", lambda row: row[0]), ("date", lambda row: (dates[row[0]], row[0]))):
+            with self.subTest(order=order):
+                rows, cursor = [], None
+                while True:
+                    page, cursor = Transaction.get_page(cursor, 97, order)
+                    rows.extend(page)
+                    if cursor is None:
+                        break
+                self.assertEqual(rows, sorted(everything, key=key))
+
+    def test_purge_keeps_rollups(self):
+        self.archive_old()
+        total = len(Transaction.get_all())
+        by_user = Transaction.purge(user_id=2, chunk_size=50)
+        self.assertRollupsConsistent()
+        # A range that spans the last archive year and the hot table
+        by_date = Transaction.purge(start="2024-12-01", end="2025-01-31", chunk_size=50)
+        self.assertRollupsConsistent()
+        archived_id = archive.query("SELECT id FROM {transactions} ORDER BY id LIMIT 1",
+                                    end="2024-12-31")[0][0]
+        hot_id = database.get_read_connection().execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+        by_ids = Transaction.purge(ids=[archived_id, hot_id, 10 ** 9])
+        self.assertEqual(by_ids, 2)
+        self.assertRollupsConsistent()
+        self.assertGreater(by_user, 0)
+        self.assertGreater(by_date, 0)
+        self.assertEqual(len(Transaction.get_all()), total - by_user - by_date - by_ids)
+        self.assertEqual(Transaction.filter(user_id=2), [])
+
+    def test_cascade_delete_keeps_rollups(self):
+        self.archive_old()
+        with contextlib.redirect_stdout(io.StringIO()):  # the refusal is explained on stdout
+            self.assertFalse(User.delete(1))  # user 1 has archived and hot transactions
+        self.assertTrue(User.delete(1, cascade=True))
+        self.assertRollupsConsistent()
+        self.assertEqual(Transaction.filter(user_id=1), [])
+        self.assertFalse(archive.has_rows("user_id = ?", (1,)))
+
+
+if __name__ == "__main__":
+    unittest.main()